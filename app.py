@@ -14,10 +14,15 @@ import base64
 
 # Importar modulos propios
 from config import (
-    MONTH_NAMES_FULL, formatear_fecha, obtener_ultimo_dia_habil, get_config_by_year
+    MONTH_NAMES_FULL, MODO_CENTAVOS, TOP_PARTIDAS_UR, formatear_fecha,
+    obtener_ultimo_dia_habil, get_config_by_year
+)
+from cache import huella_contenido, leer_resultado, rutas_resultados
+from csv_loader import EXTENSIONES_ACEPTADAS
+from batch_processor import procesar_archivo, procesar_lote
+from map_processor import (
+    COLUMNAS_CUBO, recortar_periodo, comparar_cortes_map, desglosar_cubo
 )
-from map_processor import procesar_map
-from sicop_processor import procesar_sicop
 from excel_map import generar_excel_map
 from excel_sicop import generar_excel_sicop
 
@@ -292,6 +297,146 @@ def create_kpi_card(label, value, subtitle="", bg_color=None):
         </div>
         """
 
+CATEGORIAS_MAP = {
+    'servicios_personales': 'Servicios Personales',
+    'gasto_corriente': 'Gasto Corriente',
+    'subsidios': 'Subsidios y Gastos asociados',
+    'otros_programas': 'Otros programas',
+    'bienes_muebles': 'Bienes muebles e intangibles',
+}
+
+CONCEPTOS_COMPARACION_MAP = {
+    'Original': 'Original',
+    'ModificadoAnualNeto': 'Mod. Anual',
+    'ModificadoPeriodoNeto': 'Mod. Periodo',
+    'CongeladoAnual': 'Congelado Anual',
+    'CongeladoPeriodo': 'Congelado Periodo',
+    'Ejercido': 'Ejercido',
+}
+
+def mostrar_comparacion_map(cortes):
+    """Muestra un concepto del cuadro MAP en cada corte y su diferencia contra el corte anterior"""
+    comparacion = comparar_cortes_map(cortes)
+    
+    st.markdown("### Comparación de cortes MAP")
+    concepto = st.selectbox(
+        "Concepto",
+        options=list(CONCEPTOS_COMPARACION_MAP),
+        format_func=CONCEPTOS_COMPARACION_MAP.get,
+        key="comparacion_map_concepto"
+    )
+    
+    montos = comparacion['montos'][concepto]
+    diferencias = comparacion['diferencias'][concepto].add_prefix('Δ ')
+    tabla = pd.concat([montos, diferencias], axis=1)
+    tabla.index = [
+        CATEGORIAS_MAP.get(linea, 'Total' if seccion == 'totales' else linea)
+        for seccion, linea in tabla.index
+    ]
+    st.dataframe(
+        tabla.style.format('${:,.2f}', na_rep='-'),
+        use_container_width=True
+    )
+
+def resumen_lote(salida):
+    """Extrae los totales comparables de un archivo procesado en lote"""
+    resultados = salida['resultados']
+    metadata = resultados['metadata']
+    totales = resultados['totales']
+    if salida['tipo'] == 'MAP':
+        mod_anual = totales['ModificadoAnualNeto']
+        mod_periodo = totales['ModificadoPeriodoNeto']
+        ejercido = totales['Ejercido']
+    else:
+        mod_anual = totales['Modificado_anual']
+        mod_periodo = totales['Modificado_periodo']
+        ejercido = totales['Ejercido_acumulado']
+    return {
+        'Archivo': salida['filename'],
+        'Reporte': salida['tipo'],
+        'Fecha': formatear_fecha(metadata['fecha_archivo']),
+        'Original': totales['Original'],
+        'Mod. Anual': mod_anual,
+        'Mod. Periodo': mod_periodo,
+        'Ejercido': ejercido,
+        '% Avance': ejercido / mod_periodo * 100 if mod_periodo > 0 else 0,
+    }
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def leer_corte_guardado(ruta, mtime):
+    """Salida guardada en `ruta`; `mtime` es parte de la llave para releerla si el archivo cambia"""
+    # Sin tocar el archivo: cambiar su fecha invalidaría la llave en cada recarga
+    return leer_resultado(ruta, tocar=False)
+
+def ultimo_corte_guardado(tipo):
+    """Último corte preprocesado del tipo de reporte, leído del disco solo si cambió"""
+    for ruta, mtime in rutas_resultados(tipo):
+        salida = leer_corte_guardado(str(ruta), mtime)
+        if salida is not None:
+            return salida
+    return None
+
+def mostrar_lote(archivos):
+    """Procesa varios archivos en paralelo y muestra sus resultados lado a lado"""
+    # La llave es el hash de cada archivo: dos archivos con el mismo nombre y
+    # tamaño pero distinto contenido no se confunden
+    contenidos = [(archivo.name, archivo.getvalue()) for archivo in archivos]
+    llave = tuple(huella_contenido(contenido) for _, contenido in contenidos)
+    if st.session_state.get('lote_llave') != llave:
+        with st.spinner(f"Procesando {len(archivos)} archivos..."):
+            st.session_state['lote_salidas'] = procesar_lote(contenidos)
+        st.session_state['lote_llave'] = llave
+    salidas = st.session_state['lote_salidas']
+    
+    correctas = [salida for salida in salidas if salida['error'] is None]
+    for salida in salidas:
+        if salida['error'] is not None:
+            st.error(f"Error al procesar **{salida['filename']}**: {salida['error']}")
+    if not correctas:
+        return
+    
+    st.success(f"{len(correctas)} de {len(salidas)} archivos procesados")
+    
+    st.markdown("### Comparativo")
+    df_lote = pd.DataFrame([resumen_lote(salida) for salida in correctas])
+    st.dataframe(
+        df_lote.style.format({
+            'Original': '${:,.2f}',
+            'Mod. Anual': '${:,.2f}',
+            'Mod. Periodo': '${:,.2f}',
+            'Ejercido': '${:,.2f}',
+            '% Avance': '{:.2f}%'
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    cortes_map = [salida['resultados'] for salida in correctas if salida['tipo'] == 'MAP']
+    if len(cortes_map) > 1:
+        mostrar_comparacion_map(cortes_map)
+    
+    st.markdown("### Archivos")
+    columnas_por_fila = 4
+    for inicio in range(0, len(correctas), columnas_por_fila):
+        fila = correctas[inicio:inicio + columnas_por_fila]
+        for posicion, (col, salida) in enumerate(zip(st.columns(columnas_por_fila), fila), start=inicio):
+            datos = resumen_lote(salida)
+            with col:
+                st.markdown(create_kpi_card(
+                    f"{datos['Reporte']} {datos['Fecha']}",
+                    format_currency_millions(datos['Ejercido']),
+                    f"Ejercido, {datos['% Avance']:.2f}% avance",
+                    "#9B2247" if datos['Reporte'] == 'MAP' else "#002F2A"
+                ), unsafe_allow_html=True)
+                st.caption(salida['filename'])
+                st.download_button(
+                    label="Descargar Excel",
+                    data=salida['excel'],
+                    file_name=salida['nombre_excel'],
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    key=f"excel_lote_{posicion}"
+                )
+
 # ============================================================================
 # SIDEBAR
 # ============================================================================
@@ -312,7 +457,7 @@ with st.sidebar:
     st.markdown("### Tipo de Reporte")
     reporte_tipo = st.radio(
         "Selecciona el reporte a generar:",
-        ["MAP - Cuadro de presupuesto", "SICOP - Estado del Ejercicio"],
+        ["MAP - Cuadro de presupuesto", "SICOP - Estado del Ejercicio", "Lote - Varios archivos"],
         label_visibility="collapsed"
     )
     
@@ -341,18 +486,31 @@ st.markdown("""
 
 # Determinar que procesador usar
 es_map = "MAP" in reporte_tipo
+es_lote = "Lote" in reporte_tipo
 
 # Layout: Instrucciones al lado del upload
 col_upload, col_instrucciones = st.columns([2, 1])
 
 with col_upload:
-    st.markdown(f"### {'MAP' if es_map else 'SICOP'} - Cargar Archivo")
-    
-    uploaded_file = st.file_uploader(
-        "Arrastra tu archivo CSV aqui o haz clic para seleccionar",
-        type=['csv'],
-        help="Sube el archivo CSV exportado del sistema correspondiente"
-    )
+    if es_lote:
+        st.markdown("### Lote - Cargar Archivos")
+        
+        archivos_lote = st.file_uploader(
+            "Arrastra tus archivos MAP y SICOP aqui o haz clic para seleccionar",
+            type=EXTENSIONES_ACEPTADAS,
+            accept_multiple_files=True,
+            help="Cada archivo se clasifica como MAP o SICOP automaticamente y se procesan en paralelo"
+        )
+        uploaded_file = None
+    else:
+        st.markdown(f"### {'MAP' if es_map else 'SICOP'} - Cargar Archivo")
+        
+        uploaded_file = st.file_uploader(
+            "Arrastra tu archivo CSV aqui o haz clic para seleccionar",
+            type=EXTENSIONES_ACEPTADAS,
+            help="Sube el archivo CSV exportado del sistema correspondiente (tambien se aceptan .zip, .gz y .xz)"
+        )
+        archivos_lote = []
 
 with col_instrucciones:
     st.markdown("""
@@ -367,20 +525,48 @@ with col_instrucciones:
     </div>
     """, unsafe_allow_html=True)
 
-if uploaded_file is not None:
+# Sin archivo: mostrar el ultimo corte preprocesado, si existe
+ultimo_corte = None
+if not es_lote and uploaded_file is None:
+    ultimo_corte = ultimo_corte_guardado('MAP' if es_map else 'SICOP')
+
+if archivos_lote:
+    mostrar_lote(archivos_lote)
+
+elif uploaded_file is not None or ultimo_corte is not None:
     # Leer archivo
     try:
-        df = pd.read_csv(uploaded_file, encoding='latin-1', low_memory=False)
-        filename = uploaded_file.name
-        
-        st.success(f"Archivo cargado: **{filename}** ({len(df):,} registros)")
+        excel_cache = None
         
-        # Procesar segun tipo
-        with st.spinner("Procesando datos..."):
-            if es_map:
-                resultados = procesar_map(df, filename)
-            else:
-                resultados = procesar_sicop(df, filename)
+        if uploaded_file is None:
+            # Corte preprocesado por inbox_watcher.py
+            filename = ultimo_corte['filename']
+            resultados = ultimo_corte['resultados']
+            excel_cache = ultimo_corte['excel']
+            st.info(f"Mostrando el ultimo corte procesado: **{filename}**. Sube un archivo para ver otro corte.")
+        else:
+            filename = uploaded_file.name
+            contenido = uploaded_file.getvalue()
+            
+            # Los resultados quedan en la sesión: cambiar el periodo o el desglose
+            # vuelve a ejecutar el script sin volver a procesar el archivo
+            llave = (huella_contenido(contenido), filename, MODO_CENTAVOS)
+            if st.session_state.get('archivo_llave') != llave:
+                with st.spinner("Procesando datos..."):
+                    salida = procesar_archivo(contenido, filename)
+                if salida['error'] is not None:
+                    raise ValueError(salida['error'])
+                st.session_state['archivo_salida'] = salida
+                st.session_state['archivo_llave'] = llave
+            salida = st.session_state['archivo_salida']
+            
+            if salida['tipo'] != ('MAP' if es_map else 'SICOP'):
+                st.warning(f"El archivo es un reporte **{salida['tipo']}**; se procesa como {salida['tipo']}.")
+                es_map = salida['tipo'] == 'MAP'
+            registros = salida['resultados']['metadata']['registros']
+            st.success(f"Archivo cargado: **{filename}** ({registros:,} registros)")
+            resultados = salida['resultados']
+            excel_cache = salida['excel']
         
         metadata = resultados['metadata']
         config = metadata['config']
@@ -404,6 +590,18 @@ if uploaded_file is not None:
         if es_map:
             st.markdown("### Resumen Presupuestario")
             
+            # Periodo del cuadro: por omisión el del archivo; otro mes se arma sin reprocesar
+            mes_periodo = st.selectbox(
+                "Periodo al mes de",
+                options=list(range(1, 13)),
+                index=metadata['mes_periodo'] - 1,
+                format_func=lambda m: MONTH_NAMES_FULL[m - 1],
+            )
+            if mes_periodo != metadata['mes_periodo']:
+                resultados = recortar_periodo(resultados, mes_periodo)
+                metadata = resultados['metadata']
+                excel_cache = None
+            
             totales = resultados['totales']
             
             # KPIs principales
@@ -428,7 +626,7 @@ if uploaded_file is not None:
                 st.markdown(create_kpi_card(
                     "Modificado Periodo",
                     format_currency_millions(totales['ModificadoPeriodoNeto']),
-                    f"Al mes de {MONTH_NAMES_FULL[metadata['mes'] - 1]}",
+                    f"Al mes de {MONTH_NAMES_FULL[metadata['mes_periodo'] - 1]}",
                     "#E6D194"
                 ), unsafe_allow_html=True)
             
@@ -448,13 +646,7 @@ if uploaded_file is not None:
             # Preparar datos para tabla
             categorias = resultados['categorias']
             cat_data = []
-            for cat_key, cat_name in [
-                ('servicios_personales', 'Servicios Personales'),
-                ('gasto_corriente', 'Gasto Corriente'),
-                ('subsidios', 'Subsidios y Gastos asociados'),
-                ('otros_programas', 'Otros programas'),
-                ('bienes_muebles', 'Bienes muebles e intangibles')
-            ]:
+            for cat_key, cat_name in CATEGORIAS_MAP.items():
                 if cat_key in categorias:
                     datos = categorias[cat_key]
                     disponible = datos['ModificadoPeriodoNeto'] - datos['Ejercido']
@@ -517,6 +709,26 @@ if uploaded_file is not None:
                     use_container_width=True,
                     hide_index=True
                 )
+                
+                # Desglose de un programa por UR y partida (montos anuales)
+                if len(df_prog) > 0:
+                    st.markdown("#### Desglose por UR y partida")
+                    cubo = resultados['cubo']
+                    formato_cubo = {col: '${:,.2f}' for col in COLUMNAS_CUBO}
+                    
+                    col_d1, col_d2 = st.columns(2)
+                    with col_d1:
+                        prog_desglose = st.selectbox("Programa", df_prog['Programa'], key="desglose_programa")
+                    por_ur = desglosar_cubo(cubo, 'NuevaUR', Pp=prog_desglose)
+                    with col_d2:
+                        ur_desglose = st.selectbox("UR", por_ur.index, key="desglose_ur")
+                    
+                    st.dataframe(por_ur.style.format(formato_cubo), use_container_width=True)
+                    st.markdown(f"**Partidas de la UR {ur_desglose}**")
+                    st.dataframe(
+                        desglosar_cubo(cubo, 'PARTIDA', Pp=prog_desglose, NuevaUR=ur_desglose).style.format(formato_cubo),
+                        use_container_width=True
+                    )
             
             with tab3:
                 col_g1, col_g2 = st.columns(2)
@@ -955,17 +1167,17 @@ if uploaded_file is not None:
                 st.markdown("---")
                 
                 # =====================================================================
-                # TOP 5 PARTIDAS CON MAYOR DISPONIBLE
+                # PARTIDAS CON MAYOR DISPONIBLE
                 # =====================================================================
                 
-                st.markdown("#### Cinco partidas con el mayor monto de disponible al periodo")
+                st.markdown(f"#### {TOP_PARTIDAS_UR} partidas con el mayor monto de disponible al periodo")
                 
                 # Si hay datos de partidas disponibles
                 if 'partidas_por_ur' in resultados and ur_codigo in resultados.get('partidas_por_ur', {}):
                     partidas_ur = resultados['partidas_por_ur'][ur_codigo]
                     
-                    # Ordenar por disponible y tomar top 5
-                    partidas_sorted = sorted(partidas_ur, key=lambda x: x.get('Disponible', 0), reverse=True)[:5]
+                    # Ordenar por disponible y tomar las primeras TOP_PARTIDAS_UR
+                    partidas_sorted = sorted(partidas_ur, key=lambda x: x.get('Disponible', 0), reverse=True)[:TOP_PARTIDAS_UR]
                     
                     if partidas_sorted:
                         total_disp = datos_ur['Disponible_periodo']
@@ -1048,12 +1260,12 @@ if uploaded_file is not None:
         
         # Generar Excel formateado
         if es_map:
-            excel_bytes = generar_excel_map(resultados)
+            excel_bytes = excel_cache or generar_excel_map(resultados)
             fecha_str = date.today().strftime('%d%b%Y').upper()
             config_str = "Prog2026" if config['usar_2026'] else "Prog2025"
             filename_excel = f'Cuadro_Presupuesto_{config_str}_{fecha_str}.xlsx'
         else:
-            excel_bytes = generar_excel_sicop(resultados)
+            excel_bytes = excel_cache or generar_excel_sicop(resultados)
             fecha_str = date.today().strftime('%d%b%Y').upper()
             config_str = "URs2026" if config['usar_2026'] else "URs2025"
             filename_excel = f'Estado_Ejercicio_SICOP_{config_str}_{fecha_str}.xlsx'
@@ -0,0 +1,112 @@
+# ============================================================================
+# PROCESAMIENTO DE VARIOS ARCHIVOS A LA VEZ
+# ============================================================================
+
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from config import MODO_CENTAVOS, PROCESOS_LOTE, UMBRAL_BLOQUES_MB, detectar_fecha_archivo
+from cache import calcular_clave_resultado, cargar_con_cache, cargar_resultado
+from csv_loader import detectar_reporte, excede_tamaño
+from map_processor import procesar_map
+from sicop_processor import procesar_sicop, procesar_sicop_por_bloques
+from excel_map import generar_excel_map
+from excel_sicop import generar_excel_sicop
+
+
+def nombre_excel(tipo, fecha_archivo, usar_2026):
+    """Nombre del Excel descargable de un archivo del lote"""
+    fecha_str = fecha_archivo.strftime('%d%b%Y').upper()
+    if tipo == 'MAP':
+        config_str = "Prog2026" if usar_2026 else "Prog2025"
+        return f'Cuadro_Presupuesto_{config_str}_{fecha_str}.xlsx'
+    config_str = "URs2026" if usar_2026 else "URs2025"
+    return f'Estado_Ejercicio_SICOP_{config_str}_{fecha_str}.xlsx'
+
+
+def procesar_archivo(contenido, filename):
+    """
+    Clasifica, procesa y genera el Excel de un archivo.
+
+    Si el archivo ya está en el cache de resultados (ver inbox_watcher.py) se
+    regresa la salida guardada. Se ejecuta en un proceso del pool, por lo que
+    solo regresa objetos que se pueden serializar; el DataFrame procesado no
+    se regresa.
+
+    Args:
+        contenido: bytes del archivo (CSV o comprimido)
+        filename: nombre original del archivo
+
+    Returns:
+        Diccionario con 'filename', 'tipo', 'resultados', 'excel',
+        'nombre_excel' y 'error' (None si no hubo error)
+    """
+    salida = {
+        'filename': filename,
+        'tipo': None,
+        'resultados': None,
+        'excel': None,
+        'nombre_excel': None,
+        'error': None,
+    }
+    try:
+        tipo, _ = detectar_reporte(io.BytesIO(contenido), filename)
+        salida['tipo'] = tipo
+
+        guardado = cargar_resultado(calcular_clave_resultado(contenido, tipo, filename))
+        if guardado is not None:
+            return {**guardado, 'filename': filename}
+
+        if tipo == 'SICOP' and excede_tamaño(contenido, UMBRAL_BLOQUES_MB * 1024 ** 2):
+            resultados = procesar_sicop_por_bloques(io.BytesIO(contenido), filename, centavos=MODO_CENTAVOS)
+        else:
+            df = cargar_con_cache(contenido, tipo, filename, centavos=MODO_CENTAVOS)
+            procesador = procesar_map if tipo == 'MAP' else procesar_sicop
+            resultados = procesador(df, filename, centavos=MODO_CENTAVOS, ligero=True)
+            del df
+        resultados.pop('df_procesado', None)
+
+        if tipo == 'MAP':
+            salida['excel'] = generar_excel_map(resultados)
+        else:
+            salida['excel'] = generar_excel_sicop(resultados)
+        metadata = resultados['metadata']
+        salida['nombre_excel'] = nombre_excel(tipo, metadata['fecha_archivo'], metadata['config']['usar_2026'])
+        salida['resultados'] = resultados
+    except Exception as e:
+        salida['error'] = str(e)
+    return salida
+
+
+def _orden_lote(salida):
+    """Ordena por tipo de reporte y fecha del corte"""
+    fecha, _, _ = detectar_fecha_archivo(salida['filename'])
+    return (salida['tipo'] or '~', fecha, salida['filename'])
+
+
+def procesar_lote(archivos, max_procesos=None):
+    """
+    Procesa varios archivos en paralelo con un pool de procesos acotado.
+
+    Args:
+        archivos: lista de tuplas (filename, contenido)
+        max_procesos: procesos simultáneos; por omisión PROCESOS_LOTE
+
+    Returns:
+        Lista de resultados de procesar_archivo, ordenada por tipo y fecha
+    """
+    if not archivos:
+        return []
+    procesos = max(1, min(max_procesos or PROCESOS_LOTE, len(archivos)))
+
+    if procesos == 1:
+        salidas = [procesar_archivo(contenido, filename) for filename, contenido in archivos]
+    else:
+        # 'spawn' evita heredar el estado del servidor de Streamlit en cada proceso
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+            futuros = [pool.submit(procesar_archivo, contenido, filename) for filename, contenido in archivos]
+            salidas = [futuro.result() for futuro in futuros]
+
+    return sorted(salidas, key=_orden_lote)
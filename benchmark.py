@@ -0,0 +1,92 @@
+"""
+SADER - Sistema de Reportes Presupuestarios
+Mediciones de rendimiento sobre archivos MAP y SICOP reales
+
+Uso:
+    python benchmark.py MAP archivo_map.csv [otro.csv ...]
+    python benchmark.py SICOP archivo_sicop.csv [otro.csv ...]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from csv_loader import ENCODING_CSV, cargar_csv, convertir_a_centavos
+from map_processor import procesar_map
+from sicop_processor import procesar_sicop
+
+REPETICIONES = 3
+
+
+def medir(funcion, repeticiones=REPETICIONES):
+    """Ejecuta la función varias veces y regresa (mejor tiempo en s, último resultado)"""
+    mejor = None
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, resultado
+
+
+def reportar(titulo, mediciones):
+    """Imprime una tabla de tiempos contra la primera medición"""
+    print(f"\n{titulo}")
+    base = mediciones[0][1]
+    for nombre, segundos, detalle in mediciones:
+        print(f"  {nombre:<28} {segundos:8.3f} s  x{base / segundos:5.2f}  {detalle}")
+
+
+def benchmark_lectura(tipo, ruta):
+    """Compara la lectura original contra el cargador tipado (C y PyArrow)"""
+    filename = Path(ruta).name
+
+    def original():
+        return pd.read_csv(ruta, encoding=ENCODING_CSV, low_memory=False)
+
+    def cargador(motor):
+        return lambda: cargar_csv(ruta, tipo, filename, motor=motor)
+
+    mediciones = []
+    for nombre, funcion in [
+        ('read_csv original', original),
+        ('cargar_csv motor C', cargador('c')),
+        ('cargar_csv motor PyArrow', cargador('pyarrow')),
+    ]:
+        segundos, df = medir(funcion)
+        memoria = df.memory_usage(deep=True).sum() / 1024 ** 2
+        mediciones.append((nombre, segundos, f"{len(df):,} filas, {df.shape[1]} cols, {memoria:,.1f} MB"))
+    reportar(f"Lectura {tipo}: {filename}", mediciones)
+
+
+def benchmark_procesamiento(tipo, ruta):
+    """Mide el procesador del reporte sobre el archivo ya leído, en pesos y en centavos"""
+    filename = Path(ruta).name
+    df = cargar_csv(ruta, tipo, filename)
+    procesador = procesar_map if tipo == 'MAP' else procesar_sicop
+
+    mediciones = []
+    for nombre, centavos in [('pesos', False), ('centavos', True)]:
+        datos = convertir_a_centavos(df.copy()) if centavos else df
+        # Cada repetición trabaja sobre una copia: los procesadores agregan columnas
+        segundos, _ = medir(lambda: procesador(datos.copy(), filename, centavos=centavos))
+        mediciones.append((f'{procesador.__name__} {nombre}', segundos, f"{len(df):,} filas"))
+    reportar(f"Procesamiento {tipo}: {filename}", mediciones)
+
+
+def main(argv):
+    if len(argv) < 2 or argv[0] not in ('MAP', 'SICOP'):
+        print(__doc__)
+        return 1
+    tipo = argv[0]
+    for ruta in argv[1:]:
+        benchmark_lectura(tipo, ruta)
+        benchmark_procesamiento(tipo, ruta)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,198 @@
+# ============================================================================
+# CACHE LOCAL DE ARCHIVOS LEÍDOS (PARQUET)
+# ============================================================================
+
+import hashlib
+import io
+import os
+import pickle
+import uuid
+from pathlib import Path
+
+import pandas as pd
+from config import DIRECTORIO_CACHE, TAMAÑO_MAXIMO_CACHE_MB, detectar_fecha_archivo
+from csv_loader import VERSION_ESQUEMA, cargar_csv, convertir_a_centavos
+
+
+def huella_contenido(contenido):
+    """Hash SHA-256 (hex) del contenido de un archivo"""
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def calcular_clave(contenido, tipo, filename):
+    """
+    Calcula la clave de cache de un archivo.
+
+    Incluye el hash del contenido, el tipo de reporte, el año (que define el
+    esquema) y la versión de los esquemas del cargador.
+    """
+    _, _, año_archivo = detectar_fecha_archivo(filename)
+    digest = huella_contenido(contenido)
+    return f"{tipo}_{año_archivo}_v{VERSION_ESQUEMA}_{digest}"
+
+
+def _ruta_cache(clave, extension):
+    return Path(DIRECTORIO_CACHE) / f"{clave}.{extension}"
+
+
+def _guardar_atomico(ruta, escribir):
+    """Escribe a un archivo temporal y lo renombra, para no dejar archivos a medias"""
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_name(f".{ruta.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        escribir(temporal)
+        os.replace(temporal, ruta)
+    finally:
+        if temporal.exists():
+            temporal.unlink()
+
+
+def depurar_cache(limite_mb=None):
+    """Elimina los archivos usados hace más tiempo hasta quedar bajo el límite"""
+    directorio = Path(DIRECTORIO_CACHE)
+    if not directorio.exists():
+        return
+    limite = (TAMAÑO_MAXIMO_CACHE_MB if limite_mb is None else limite_mb) * 1024 ** 2
+
+    archivos = []
+    for ruta in directorio.iterdir():
+        if ruta.is_file() and not ruta.name.startswith('.'):
+            try:
+                info = ruta.stat()
+            except FileNotFoundError:
+                # Borrado por otro proceso (la aplicación o inbox_watcher.py)
+                continue
+            archivos.append((info.st_mtime, info.st_size, ruta))
+
+    total = sum(tamaño for _, tamaño, _ in archivos)
+    for _, tamaño, ruta in sorted(archivos):
+        if total <= limite:
+            break
+        try:
+            ruta.unlink()
+            total -= tamaño
+        except FileNotFoundError:
+            pass
+
+
+def cargar_con_cache(contenido, tipo, filename, motor=None, centavos=False):
+    """
+    Lee un archivo MAP/SICOP usando el cache de Parquet.
+
+    Si el mismo contenido ya se leyó antes, se regresa el DataFrame tipado
+    guardado en Parquet sin volver a leer el CSV. El uso del archivo se marca
+    actualizando su fecha de modificación (LRU).
+
+    Args:
+        contenido: bytes del archivo subido
+        tipo: 'MAP' o 'SICOP'
+        filename: nombre original del archivo
+        motor: motor de lectura para cargar_csv
+        centavos: si es True, los montos se regresan en centavos (int64)
+
+    Returns:
+        DataFrame igual al que regresaría cargar_csv
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return cargar_csv(io.BytesIO(contenido), tipo, filename, motor=motor, centavos=centavos)
+
+    ruta = _ruta_cache(calcular_clave(contenido, tipo, filename), 'parquet')
+    if ruta.exists():
+        try:
+            df = pd.read_parquet(ruta)
+            os.utime(ruta)
+            return convertir_a_centavos(df) if centavos else df
+        except (OSError, ValueError):
+            # Archivo dañado: se vuelve a generar
+            pass
+
+    # En el cache se guardan siempre los montos en pesos, tal como vienen
+    df = cargar_csv(io.BytesIO(contenido), tipo, filename, motor=motor)
+    try:
+        _guardar_atomico(ruta, lambda destino: df.to_parquet(destino, index=False))
+        depurar_cache()
+    except OSError:
+        # Sin permisos o sin espacio: se continúa sin cache
+        pass
+    return convertir_a_centavos(df) if centavos else df
+
+
+# ============================================================================
+# CACHE DE RESULTADOS PROCESADOS
+# ============================================================================
+
+# Incrementar al cambiar los procesadores o los generadores de Excel
+VERSION_RESULTADOS = 5
+PREFIJO_RESULTADOS = 'resultado'
+
+
+def calcular_clave_resultado(contenido, tipo, filename):
+    """
+    Calcula la clave de los resultados procesados de un archivo.
+
+    Los resultados dependen de la fecha del corte (tomada del nombre), por lo
+    que la clave la incluye junto con el hash del contenido.
+    """
+    fecha_archivo, _, _ = detectar_fecha_archivo(filename)
+    digest = huella_contenido(contenido)
+    version = f"v{VERSION_ESQUEMA}.{VERSION_RESULTADOS}"
+    return f"{PREFIJO_RESULTADOS}_{tipo}_{fecha_archivo:%Y%m%d}_{version}_{digest}"
+
+
+def guardar_resultado(clave, salida):
+    """Guarda la salida de procesar_archivo (resultados y Excel) en el cache"""
+    def escribir(destino):
+        with open(destino, 'wb') as f:
+            pickle.dump(salida, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    _guardar_atomico(_ruta_cache(clave, 'pkl'), escribir)
+    depurar_cache()
+
+
+def leer_resultado(ruta, tocar=True):
+    """
+    Lee la salida guardada en `ruta`, o None si no se puede leer.
+
+    Con tocar=True se actualiza la fecha de modificación para que depurar_cache
+    lo considere usado recientemente.
+    """
+    try:
+        with open(ruta, 'rb') as f:
+            salida = pickle.load(f)
+        if tocar:
+            os.utime(ruta)
+        return salida
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+
+
+def cargar_resultado(clave):
+    """Regresa la salida guardada para la clave, o None si no existe"""
+    ruta = _ruta_cache(clave, 'pkl')
+    if not ruta.exists():
+        return None
+    return leer_resultado(ruta)
+
+
+def rutas_resultados(tipo):
+    """
+    Rutas y fechas de modificación de las salidas guardadas del tipo de reporte.
+
+    Se ordenan del corte más reciente al más antiguo: el de mayor fecha de
+    archivo y, entre archivos de la misma fecha, el guardado más recientemente.
+    """
+    directorio = Path(DIRECTORIO_CACHE)
+    if not directorio.exists():
+        return []
+    patron = f"{PREFIJO_RESULTADOS}_{tipo}_*_v{VERSION_ESQUEMA}.{VERSION_RESULTADOS}_*.pkl"
+
+    candidatos = []
+    for ruta in directorio.glob(patron):
+        fecha = ruta.name.split('_')[2]
+        try:
+            candidatos.append((fecha, ruta.stat().st_mtime, ruta))
+        except FileNotFoundError:
+            pass
+    return [(ruta, mtime) for _, mtime, ruta in sorted(candidatos, reverse=True)]
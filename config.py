@@ -2,7 +2,10 @@
 # CONFIGURACIÓN GLOBAL PARA SADER REPORTES
 # ============================================================================
 
+import os
 from datetime import date, timedelta
+import numpy as np
+import pandas as pd
 from dateutil.relativedelta import relativedelta, MO
 from decimal import Decimal, ROUND_HALF_UP
 try:
@@ -17,6 +20,41 @@ except ImportError:
 
 LOGO_BASE64 = """iVBORw0KGgoAAAANSUhEUgAAAcYAAABbCAMAAADeM9UyAAAAAXNSR0IArs4c6QAAAAlwSFlzAAAXEQAAFxEByibzPwAAAIRQTFRFR3BMYT40oYMsSR0xoYMuRhwwooQuQx0uoYQtQR4uooQtRhwvooQtQh0uooQtShsxooMtRxwwooQtooMtWhY2JSUlooQtWxY2JSUlooMtooQtWhY2JSUlooQtWxY2JSUlooQtWxY2JSUlWxY3JSUlpIUuWxY3JSUlWxY3Xxg5Wxc3JycnIa3V3QAAACl0Uk5TAAMJCxIWHiMqMjY/Q0pQWV5ma3d4eIONj5GgpKqyusbJ0drl6ery9Pnr4LqIAAAaIElEQVR42uzXgWrrOBAF0CtZ0VMmymQyUxSk4pBSGuL8/wfumqSFR2Gb5bnwXHw+wJh7mfEYi8VisVgsFovFYrFYfC/nHQDvlyTmyodIsRRL4FKSI45LJnPjPJilj5VzoxaoUrUCYBnLGfGRGicJLRRBbRWxp54TgFTCEs88BM8W60kVLZmi1orUe+kDAH4LyMt2nQFXzUlK1p+SsTapqXIxCX0GvJ2CvuXo8XfoMJ3VZv+06/BjcPOJiUNTrWISEYWDWAkAWZNTQa0Jf4Ht8/F57zCJ9eF4GYZhj5/ABQBoAk1GPoXocedjAGLR3lrilkvC/+FW2/3GYVLd4Tz86+CmKPH5dRiu1+tw7DB/nksAQD1bpIBPXMpcaugrU7SEh3VPr9fr5YApucMt+PN6grEeSxwNLyvMX66384UL4UPknFPAnVOrxozUc3x8bsaUhssGE9pe78lv8ccOw/Xm8gNqDDHUvjf3+9WaamZhMX0/bGJVCo6b1YjH7O+BP2NCx/foN/hj65fxYZ+X6m7fYW6itpKIGuGDC8rSKAsnomySPUbcJPcteSI8YnVPfHhdYzr35IfjaorRPn+uEW5znuHJYxRqI7WIGwcPskxcNZGoFiKxjFEouQpCK3jE5nK9GQ6TT+PwusEUDsPnGrvjMBwwN6ZAFU64CUQleTUWsV64JFNm0moEwKVTCs1i9Pja0xjR5AfEbrxTLy9bTGJ9ve/9Dh+2l/nVmHLuxQsDIQJAEiMTSjEXJulZJbMa53YyD8CzNMutqcdXunFubobd1H+NK0zj1/lTjeN7z61GstpKKxIQRQFE07G+UksOxlyMKrGwZOYkEQC05pN4UYcvrC/Xd8PRYTIOo6lrdL8tkeEJc5L6DG6JPLiqBsQqpdTExRrnrJQaF1IVzcTKmgAgVAFE3UOfnftAXtaYzvfWuL98T43OdZ3D94i1z9AM0FuVFMKpF65CapVJVTPXrHksVUnE2AgAjIGAr6zGk/Jy/u8j59d6u9vvNutfKweMun/Yudo1N3GeLRO+McbYjKhMncKySWF6/uf3hi8nDNNpO0+ud//03p3diQEjdCNZkjWJkhP8GqfodBjJq7quqzxibwWJkuDNuUEUsfdpDOrX8f1VgAXR/aZO2Ah+B0FSNudzdz7XhbvguRBW6xBAtUalLDVCSImCoxYSUQitlSKutAyllAqX8kCsYhZylcKHKKa3ui6u40+DnFPRdK/jhKE/N3VVllXd9K8b40Geb7otqtvh+wxJde6a6M1U13FB3+QPVe+iqs/99Zzch/Kybrq+r9g7NAZlt6W6N2Gqqq6LeTzKy6rprtfmLkM0zdxdu+w+kmfuWN3UZeCEK8+v44auejqRXhp6EFs1sYlChCGiNi0JgZhqraRRSpBGThInk1SaJMWzW0VNbQwfgTXj69ifoFn0MpTHfOT2cC6WfUDHlpJ1N1xnRoNqIbtLNsb66WP1Zqp1ktt/N22zsru+LmONqw52K919cKQx6w4C9dFkod11mWYzUhY1/bDOzJaRrLnJW81T1ou855WvoJlmvf90OTwXDFtjcA46Y4yFUEoaUq0USiLpG2KDmqsYDaUoETWSIh+AcR9/wSIk/RLvZYPT0x5FPy76Gu66c+FQMhnXUsbLO1f3PE1vdjedvy8NlddZP33XdZML2DQYOFbG88a3u9kQHWhkLrR2GPvElf8mVG7ddzOzmcTzJO98duHkPZ/uAfvYN1VVd/P4tXwui+Arkst6x8hI5EoKqbgvtTGatOCKrJImRRXPG5CEhIiT3NwKABH/Imm8JttTHCvZ2cziODRVWT2qbxzLJTdc84CJog0lQLXpaLjTWM3c9VVygqA4jxsrLre/c86Cbhu6Bkcam8m+nByOiuAuX+FSy21ovlM5rKfXQTXcp8jv2XOTrEXmWfYCngiufZ/SNYAPpZDWGq1DSK0gHUuFUpGdPCtZjohGGUOEhgOA0h7/0K2eunFNxqpV79UhAJpfTLbEFSuGoatOjyXr800rj2RU7kO9W4THcwLsrqnBae3NzbN+M+0jjRCV9XmNyfquvw7DcC3mkzby70X+aidG416O7vVB3noxxs0w3ZmTq34ekGLwKAQHQdoqCVxJqQQaFEhcm1SjVoREM4+GjAfgoU6tZj78DPkkbbl419cZXXCs8AyVe7plAY2i6SyW9Hc/Ow79sHkp5izD0ciifnSs3Cu55fa7syJH+vp+nI403pkfqyAIIheIZtfNhA9VvHIpzW487+Rttlfg7oqi67Ork7Ehg5yzxyHZEo+VRm20RsI0RqM5yVjTzKM2BmkOiVJPWq4FHOF4GbtoVkzjVLkz1nW1WxD1+zgo751n6oqo6FYPt6plp4l5+iF/s6+yHi3G/W7IsgA63o40QrkcLg6P4+R1a//DicXVyXu+yduPdxr70VU/FuN0Ez0HsfJibTkwDxZ4ClUrmVAaSZCyKDUnJXD6BQ0qREIyRDacrr4Q5+9b4yZ88/PtqsRR4eLanTKdW13ehWx7h505bZEqS67Oad3Ncxxr50NdPONmdnO9R2N1oHEb3d3Grfm549ltvMxr+2apUbdvEalHV9h/DgRnDGLPQy3CxTqVaBXzlVRKkw6V0FZIQagkaoVGoZQtCatIAQAXQsmYfRDgDPmd0rcLQrHGLDsTcq7RuSn3vM3ooqRgPVJtajksvHXfd5mzmbe3rn6Lxhx2KDcTPlh1tsq77clF7uDyO8ubpjod9gsKeBJ8TJXVPvhkCLkPoZW8VQASSWEqpDBkjBTUKklI2nJFIhSCa9NeUgAmLGmKf14Vd46DNccgp3pLY+HC+73Pau6JwlCtwZGj0X0adlpnywrrrHFffCg/QaPj/uhnV4mz3TOyfEpfHVXsOFP5NBrJtBIFQCwUoQJE3koAUDhHNFZZ0oJLpQVKVBp5GnOthY01GgUQog8gxM93Y+/PXB62Zreh6lc0utCwPJ9XrZx2NObD/jqnNyeIu/OexupA486bv6Gxdhd9SKMThFVds5viONOzkAo/1fFSzVE6NWJmkUlFShlttdZaKRQpajRpKIRRAo00CkMZAoQ6TZWJ4SeyOnfjvOrjCOSr8t4ot4s2HjZv6PQfbLa9p7Ea3QL6Dlh+2IZiv0WjE9WNHmzo/B6N52An7x7sFERl//pcGgX3QEpvjXa0JFJrTwcpRDKKyEiDJLWMU0kiJUqlEdooTny6hiylPw1wdo7svAWX7E3c3Uf7EOfs7azxENEdrbHeOc0DisOaBtWvaHRe4Gh6xS9pZHCAq+42XT/5jufSqFPFhV4plSq1JPxZo2iNVsZYnWpNxqo01BhqCkMjPVRhq0KJE93Sj+m4e+xcZl8mK4puFb4P3uqlhi0x273tLnPcdzodrfHUfGyNu4Xw8zSyVdz8VzQ2P3EKa1XWVYmetjZ6hEZzBRN8qbnfKsX9MAyZIE6tEpQqJCKdcj9WimtKYyNCirkNY8MAhI5bxKNXdUHc0K8YHqtpjrflnDmIY1k3HtKyn3UBBzsazx/3rFZPoNHd5pM0snwpuN5+huv1yTT6UqGxEsDzwEelAG0ap1KT9n0tpZBKIxotdYwKWIxakUCUGlNCZn2AVFuKMYQDNorcLsGhCeAxMTyXedFcFzLuWmK/T+NHTSLsz2lsFlH2NAZbdvEJGoNmGOd06dxURZ41bpV9HrwQQOnpR6rYWCW4SFGFSJIMTiCDnDQAhNbGZFAikTThHNqk0mMfdps5OBqv2aFTx50w9gXAH1qj83Y1g3dR/ymN7H0au8/S6OqBTX7aJxxPRqrj0FNaKF9ojWQ4xgpJG9KotZaSlAyn0y5ct0YikqbUhPBzRIuHHK4Ow76e7Tp9Hwgeh3MG8KfW6F6ZQ635dPocjacPaczBgf0ejafGLR4LymfTyGKhGcBke8CUljF4gibehJLaGlJSk0xRKylSD0DpsDVKIWqUxAB8z9fx+73ia2kxWBHlza605vLyq1v3+3O5J+x3aSz3Fda7rS9X1sdItf6YxnVdf5/G4mHo92gsXvfjz7fGsL1YABCIioGnpQROlmKSREoSSYNcCSSNqdA6BC/0jCZEIj27WSl4q1T6XgVnSQHYIdJbxHd66Yu8am6oq0OHiiu/fESjW4eP5lPPuYwLWB5Lrs2exv5A47GKwzbOql1S9Ts0Lhdeo/vtn0wjl6Y1KYDHJUoAzTWXrTGWpySFkkJoQcoYaUgLScgn5qRuVWu1EQCeMmjJ4jt9je5tPjy0M6/yviXP2JxGvGkby34zb3RLbJfAHdWwppLVwecG3YfW6Fg+vpruLFc++nXeGL19jKB/bqTK2gteLnxOAFELIbTPFAlrNEnUklAqacgYrcikhJqUD54ftty2yvKJRkvGav1uVHF0hs2u05HNVnItTkGSV82562/oznUe7aLdX1qjI2qJkNyuV+3sojzuN+7z72g4RKqPfLC8OrlRV65wI0caT0enckN32vnUZ1ojkmrRg6UeY0yKc46YatQ0GSAqpdEI0lbEAg1qxBSAGaGsvEgApiySQXXQcn9s83T6XNTrlHBtzsP4iM5FAvlCYx/A8QaORsfqPPDalEkUJUXdj65PIru6vf796WN1aP7fhdnDto84RI/ar/fF2juN+a4B8NCqkrnPT6ZRtIYu1l8rATGnVMrYnz6nqJEQtVRSa8MpTRVqQ1qjYKAkN3yiEdLWGmvjd4zxIxpfr/n60TW8OLhmKHfCe23K2Zv2muJ+9Wvfdf0wLu5gz1qz9my45oFq34yx6d9Jdq2iIGuuCzGu92aomKPD0Xjneeijo1O9u3yv7J9dxeEXKy+zLfnGAo+1VQCxnLcQfSLkpHyS3KSpElrNkY1C5aciNnErAfxYttYKcNhZUQNHp+qC1Ucb2rPpzMLFRMfHrR961pyDXnHPQZPD9nOVJVm1qHG/z7W/UbLZy+u1v7o+ylO3jZ6LJMmbq5sn2R/PDwWtVdq6LOupqe/ZTjUkMp5MZxp9KYSVsReTnusyk1WGPsScc01KKK1QE83bVV6IYSsA5EUaLT3YgUXdsQ/Ovc2OKKf7ccIw62s7OhTOZx28lFPYhGHrEHVdIg5jnz+Yg2P4dc1uDmmnW/b2L9xjj0/5Oj6MTtjRuLqE4+JYLNdttx7785OLcb5oEWenyCyJMEylRS516oEDk2RQEXKFChENKYHKD+M2ndNNkhaPyYZzecew5O5Qin5xgnN9KkuyvL4+tkp5iy6P9RnXEvW4V3yqh3HXItll4FC6Q6uvdKGo8x371TFxY84Zru5hd4uy2xIO99xO/OM3FbjLomJ8rlM11ihrZtJUi1yHhL5IbQxhTHpt0PG10qgkSDRKoUTDtQ2BL0tqKJSVsEPi3tlrtNP9Ts3nxXONXRmcgDG3+N/VGTyo8p29hsOrMhefN/vu630P3mLqjuDS0XifbBeGFFdneI9/NNA8TDM0ASxF+THbUz+88UOM1f0k2ipZ9OwqDpOWcNtn8qxV3MZCGOQcW0PCSGB+KKVETEUKQimhteBaTu42BvB5Gmt2iCK3yHM4Bzt6u9fRoS9OzXjcXao3Gtn8djvkh7fbzbPbCjpPjaXX7lxFsEfW9KtLO1cBQN4P1+vQFyvFDl2yfynG67k67Ta9toe7ngsGUM9lxi5aI6cNjkaH7Cba8Dr05zrZHMB4LZ74RY0yjlcm4jCW1ktDHsbcagBhTEqGLkITtUYjhzD1wrm2Cpw8AG3JoucdcvOsKMqyKLLgDb95Ua4oEsiGY90FysfYIyiqekFxenOH20zFDeW+8sPYKcnyPIsYOLhDSVk3TV3mwfwxySYskVRWVnVdVdW+kHS6DZeHZ4Agr+Z5MjZ/yiasV0XlJm/+jgDBTbQsOa1z5zdkJ3gapCXSzqRkS7EUoKQNYzn905IgQ9a2F31pJ8JECH5KCrUP3LbUIsnP/Q1pNbr+jDsaFxw9/W9V2fzDnvHXsIx9Qo7DFAyeBsbbVlJ78WGCD34obItKEQGEPo9T7XG6XChOddsairluSUil5gIetWRvEPAp1OORr3JYQ4S/X973Z+DtRdvWsplToVOAWAnJZctBEI+59i+tECKVfijVRRsbpyblKCRAaNCQscaDT8DtgUTgENXDuAY4f4n5MzC6XJBaNfOILcYxAGgUeLGkwjDW3CCEcRgDGCRtVJoqa/icU14IjTEaPgXXBFzn0bSPlZTnfpxH/rL4Cai2lepi43Tu6RCCZAyauI9CX6y9oFY+yJCLEC2XRqWSg05nDxyb1hhrQ/gkypW1uV/nOv22JmPsLyt/jtjOpRi57iJrVEqhgDma4RpI+J7PJbZWKSkplqm8kA/gWxO21loOnwUr3Xfu3f/fV9FfSj4F2aKlFmGGn2KYylgrz+Oh53ueESq1hrThs/Vhe2ll7AF42AoTxz78D0jqfhhXzFbZFBH8tcXPgTHRGpMuLBpUPATwFFctKVQphYDIzdzpQVJpaSQAeByAGxQp/G8I8ro5dzecz02VB38p/Dw8ScZqIWQI4BNxqVEAeILiWMnUGLykqbah54UxlyoFNrEsQYgULwSfwfGbTQ5fd8JO7I+SOnfR0+FmPp3YH5z9/w4m2hY1XS4CAOJ4dqyaATce00pzIaUHkrhGI9C2YiJeW6GtBj8N3+Ulf3lJTh/a/9uBL9/y/cDLtwQekb3kb3Pu5J8S9ii/5W7yXyAryzL5fWW/fMvg67cIHFhwm+BnZZjk2wv8B4h9Dy94URTDEoNyzUASg5S0SuddZOOlxshQ8olFNDdYHTJw2HHy49/v/0QfeNIvGeyRfSsY7PD1x45X9u3HvwHskXwt3ir7RwnB1wQ+gpv/339/fI3gN/HlJs4/3x9Pz79///eHI3aP7MdX+C/APNUatBc9O1llUaiYGx8YSVIIANxAaoRO154BNMYaQyG8h+jHtyQvGAQvX8oTQFB+eYlOZZJ9iSD/8iWB08uPr2XAii/T4eAlKl6C27+QvHx5WRnIvpRfv2fAituV68j3f76Xy5HsNpbnyZckeMkAkukm0e3C6CW/0ViwL7fJT8ntnGkwK27DLJ/vdEN+Gw5eioXGMr+deoLTJN4yT7TJUOTJSxaUN8nYLMNC47d/Izg5kfIfX7OvP14gm0VPIM9vtzrND/Wf0Qihba1qLziXHTmKUP1fe2fb8rgKhOGx1rU27ykRDYpBLH7w//+/M2PS7lnYPQd2WcqyuUubNurMdK7e9MlTSMZ+vV2g1w/y6GW0X3qtrb7Atb1axLhZ60f2fYw5kdtEyDEbJlwppZMppqKGFGNqZColKh5SLAaagtOkKw0sOZbdw10qKaW6J8WdrElTDACKRqijOLdraHksJfGpLNRWwqgweJBkywHvpoSy7JlYdesC095i+pjwUCQzWGUQCnOnDpZUa3C4mRociDhMxb4wMlMo/I7RAOU1WDqlcxlTiZAS7lfFfe7sxn7WW/+lR477yTa9vSC/dux7aK1Hf95ty6B/9g+/ev3wM4Pva8nFSZiKQTyyK0YoLmMxSiBD7DZbCpoRpOpy5Kpk9CphFEqZMh1OESE3IgeFQQDFYwSXJRjsFM11aAXWlYW5MggFO0ZDGLnBO8MnL4ydoEwpCgCQKTBafmDEYaVKUFhPhxvJqQZMXsPzpuRJKkQ8FHdgFMhHHCV1JSJt9cZIawQoSvVBjPBYbXt/bq3vgUQc58fYj+NMNz2zt2/HdVu99/MFfqTOlSBMiSGVZqlfcjJGBJdzjCXAVAYAZUKoGB0Ac0WxJYRYMbKQBZjcqJJwjzt6tgRkRQymilHiTjJa5gD/xgg131eMzSuT2OENMbAXRgoz1CSGu5IWzo8asByo9oYBIwuEf2CkmDKFWlJOtdzljZFSuRDKJzGyebPrOm72OX916Dg/Ho8Zda9TrqNtAUY/99rqFn4kzpAL8TNN0wl6i8BkDBxEjl3TKGoytXBR6Y2x2uLlxlAkYZRopaZTgDIl483hvA6WilEcGIs4ME7fYpzoTnbbM8UdY5cCTn1hVDlxtBomkcC7UKbmqMHlitEQRgMyh5cbMSWuIow0rLLjdeS1hjuM8Vk30m9U9uG9vcP1xm4tg124Zfv4w1vr76zVt8v1Aj9WF8wSk8SeNN3EmhIn00kkBowaupCf3CSxa1OpGNmB0VEnd2huQR+zkKdmUdXLSQoRshpwZSgNga6NpKmT4x3mCG+MbkLXhCm+3OgoUxKvP3jljrE4k6q3UtcsolkaUxY0YBO+caOMecKqXxhxNr08ML6+a5d0uJGHMiwfdWNV67e5nWf9fKzPdqfH2OUKpNu26m2drYb5fw76VUg5DMCWkJPjbIloQhEcB5Au4XOQIUfVxRyc4yoaxGii5C5Fg8uApuFQUNBQIMLYRAPApjjgpBDo4x8F7V0oYgqcm5RMwJZicBVykAKDuYBMowKgTCZUjASZAcnEGN1AOAJGEE3EWqU4ajBB1fB1OCcjMFA9bqSX0XCAfViEILHY6F5rhpidc6Ci+ey/c/Stf67rc31u3q+3Xh9n4rxf5w21Wu9HuNgR/lNCKVFxKMXrRjImJbWPKUVbQY9ScS4Zl4JWSA5cSRACSFwJJjltldwD8mMvTiKHCcnq6xpR1IkgRQ0DopGMgr13gKRw7DikHY4aJVX0rpbVWr9ZhpUdw0eB8igdUMewUILWYLHvVJzLOvZJMbZuVuv2/hj1tj3RgOtqt9mu3iNDbTePRD93pnDWReNK+OkedeHrYvYbS/+87n3rn3qbtW1Xrb3WYzvPvu/9c7V2RZD2Bp+Tcs4ZBT+P0Uj4K8QArNbPDbHdxrFf9ytw6PYyeo/e1J++xvGF/dq7+3t0gXHtR3+DW7ut8+ZHfLwDjH573M6L4v55+vLU80YOtFt7duPPxThe/ExHIdf2dnbjzxWDKwBcbueF4k+dOnXq1KlTp06dOnXq1KlTp36b/gGN+mEBlT1ZBAAAAABJRU5ErkJggg=="""
 
+# ============================================================================
+# OPCIONES DE EJECUCIÓN
+# ============================================================================
+
+# Copy-on-write: la proyección de columnas del modo ligero (proyectar_columnas)
+# comparte los datos del archivo leído en lugar de copiarlos. En pandas 3
+# siempre está activo; en pandas 2.2 se activa aquí para todos los módulos
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
+# Motor de lectura de CSV: 'c' (pandas) o 'pyarrow' (multihilo)
+MOTOR_CSV = os.environ.get('SADER_MOTOR_CSV', 'c')
+
+# Cache local de archivos ya leídos (Parquet), con límite de tamaño
+DIRECTORIO_CACHE = os.environ.get(
+    'SADER_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+)
+TAMAÑO_MAXIMO_CACHE_MB = int(os.environ.get('SADER_CACHE_MB', '2048'))
+
+# Archivos SICOP más grandes que esto se procesan por bloques
+UMBRAL_BLOQUES_MB = int(os.environ.get('SADER_UMBRAL_BLOQUES_MB', '300'))
+
+# Procesos simultáneos al procesar varios archivos a la vez
+PROCESOS_LOTE = int(os.environ.get('SADER_PROCESOS_LOTE', str(min(4, os.cpu_count() or 1))))
+
+# Montos en centavos enteros (int64) en lugar de pesos en punto flotante
+MODO_CENTAVOS = os.environ.get('SADER_CENTAVOS', '0') == '1'
+
+# Partidas con mayor disponible que se muestran por UR en el dashboard SICOP
+TOP_PARTIDAS_UR = int(os.environ.get('SADER_TOP_PARTIDAS', '5'))
+
+# Carpeta que vigila inbox_watcher.py y segundos entre revisiones
+DIRECTORIO_ENTRADA = os.environ.get('SADER_INBOX_DIR', '')
+INTERVALO_ENTRADA_S = float(os.environ.get('SADER_INBOX_INTERVALO', '10'))
+
 # ============================================================================
 # MESES Y MAPEOS
 # ============================================================================
@@ -27,19 +65,6 @@ MONTH_NAMES_FULL = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
 
 MONTH_MAP = {name: idx + 1 for idx, name in enumerate(MONTH_NAMES)}
 
-# ============================================================================
-# MAPEO DE URs (compartido entre MAP y SICOP)
-# ============================================================================
-
-UR_MAP = {
-    121: 260, 122: 261, 123: 262, 124: 263, 125: 264, 126: 265, 127: 266, 128: 267,
-    129: 268, 130: 269, 131: 270, 132: 271, 133: 272, 134: 273, 135: 274, 136: 275,
-    137: 276, 138: 277, 139: 278, 140: 279, 141: 280, 142: 281, 143: 282, 144: 283,
-    145: 284, 146: 285, 147: 286, 148: 287, 149: 288, 150: 289, 151: 290, 152: 291,
-    153: 292, 108: 810, 215: 220, 300: 225, 310: 226, 700: 227, 600: 230, 612: 231,
-    312: 232, 315: 233, 400: 235, 311: 237, 314: 245, 113: 250
-}
-
 # ============================================================================
 # CONFIGURACIÓN MAP - PROGRAMAS 2025
 # ============================================================================
@@ -108,6 +133,24 @@ FUSION_PROGRAMAS_2026 = {
     'B004': 'B006',
 }
 
+# ============================================================================
+# CONFIGURACIÓN MAP - LÍNEAS DEL CUADRO
+# ============================================================================
+
+# Categorías del cuadro en orden de presentación con los capítulos que suman.
+# Las filas de los programas específicos van a su propia línea sin importar el
+# capítulo; la categoría con None es su subtotal.
+LINEAS_CUADRO_MAP = {
+    'servicios_personales': [1000],
+    'gasto_corriente': [2000, 3000],
+    'subsidios': None,
+    'otros_programas': [4000],
+    'bienes_muebles': [5000, 7000],
+}
+
+# Programas cuyo congelado anual se menciona en las notas del cuadro
+PROGRAMAS_CON_CONGELADOS = ['S263', 'S293', 'S304']
+
 # ============================================================================
 # CONFIGURACIÓN SICOP - DENOMINACIONES URs 2025
 # ============================================================================
@@ -366,13 +409,107 @@ FUSION_URS_2026 = {
 
 def round_like_excel(value, decimals=2):
     """Redondea como Excel (ROUND_HALF_UP)"""
-    import pandas as pd
     if pd.isna(value):
         return 0
     d = Decimal(str(value))
     return float(d.quantize(Decimal(10) ** -decimals, rounding=ROUND_HALF_UP))
 
 
+def round_like_excel_array(values, decimals=2):
+    """
+    Versión vectorizada de round_like_excel para arreglos y Series.
+
+    Da el mismo resultado que round_like_excel en cada elemento: cada valor se
+    compara contra el punto medio (n + 0.5) / 10**decimals correctamente
+    redondeado, lo que equivale a redondear su representación decimal más
+    corta (la de str). Los valores demasiado grandes para garantizarlo se
+    redondean uno por uno con Decimal. Los NaN se convierten en 0.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    if decimals < 0:
+        resultado = np.vectorize(lambda v: round_like_excel(v, decimals), otypes=[np.float64])(x)
+    else:
+        escala = 10.0 ** decimals
+        absoluto = np.abs(x)
+        with np.errstate(invalid='ignore'):
+            n = np.floor(absoluto * escala)
+            n += absoluto >= (n + 0.5) / escala
+            resultado = np.copysign(n / escala, x)
+        nulos = np.isnan(x)
+        resultado[nulos] = 0.0
+
+        # Con |x| < 10**(14 - decimals) el punto medio tiene a lo más 15 dígitos
+        fuera = ~(absoluto < 10.0 ** (14 - decimals)) & ~nulos
+        if fuera.any():
+            resultado[fuera] = [round_like_excel(v, decimals) for v in x[fuera]]
+
+    if isinstance(values, pd.Series):
+        return pd.Series(resultado, index=values.index, name=values.name)
+    if isinstance(values, pd.DataFrame):
+        return pd.DataFrame(resultado, index=values.index, columns=values.columns)
+    return resultado
+
+
+def a_centavos(values):
+    """Convierte montos en pesos a centavos enteros (int64) con el redondeo de round_like_excel"""
+    centavos = np.rint(np.asarray(round_like_excel_array(values, 2)) * 100).astype(np.int64)
+    if isinstance(values, pd.Series):
+        return pd.Series(centavos, index=values.index, name=values.name)
+    return centavos
+
+
+def centavos_a_pesos(valor):
+    """Convierte centavos a pesos; acepta escalares, arreglos, Series y DataFrames"""
+    return valor / 100
+
+
+def montos_a_pesos(datos, excluir=()):
+    """Convierte a pesos los montos de un dict en centavos, salvo las llaves de `excluir`"""
+    return {clave: valor if clave in excluir else centavos_a_pesos(valor) for clave, valor in datos.items()}
+
+
+def mapear_distintos(serie, funcion, categorica=False):
+    """
+    Aplica `funcion` solo a los valores distintos de `serie` y reparte el
+    resultado a todas las filas por el código de categoría.
+
+    Los valores nulos se resuelven con funcion(np.nan). Con categorica=True
+    el resultado es una Series categórica con los resultados distintos como
+    categorías.
+    """
+    codigos = serie.astype('category').cat
+    tabla = [funcion(valor) for valor in codigos.categories] + [funcion(np.nan)]
+    # El código -1 (nulo) toma el último elemento de la tabla
+    if categorica:
+        codigos_tabla, categorias = pd.factorize(np.asarray(tabla, dtype=object), sort=True)
+        valores = pd.Categorical.from_codes(codigos_tabla[codigos.codes.to_numpy()], categorias)
+        return pd.Series(valores, index=serie.index)
+    return pd.Series(np.asarray(tabla)[codigos.codes.to_numpy()], index=serie.index)
+
+
+def compilar_tabla_ur(mapeo_base, fusion_urs):
+    """
+    Tabla única de unidad (texto) a UR final, con la fusión de URs ya aplicada
+    al mapeo base. Las unidades que solo aparecen en la fusión se fusionan tal cual.
+    """
+    tabla = dict(fusion_urs)
+    for unidad, ur in mapeo_base.items():
+        ur = str(ur)
+        tabla[str(unidad)] = fusion_urs.get(ur, ur)
+    return tabla
+
+
+def resolver_ur(unidad, tabla_ur):
+    """
+    UR final (texto) de un ID_UNIDAD del SICOP o una UNIDAD del MAP según
+    la tabla de compilar_tabla_ur; las unidades sin mapeo se conservan.
+    """
+    clave = str(unidad)
+    if clave not in tabla_ur and clave.isdigit():
+        clave = str(int(clave))
+    return tabla_ur.get(clave, str(unidad))
+
+
 def numero_a_letras_mx(numero):
     """Convierte número a texto en español mexicano"""
     entero = int(numero)
@@ -446,6 +583,7 @@ def get_config_by_year(año):
             'entidades_paraestatales': ENTIDADES_PARAESTATALES_2025,
             'mapeo_ur': MAPEO_UR_2025,
             'fusion_urs': {},
+            'tabla_ur': compilar_tabla_ur(MAPEO_UR_2025, {}),
             'usar_2026': False,
         }
     else:
@@ -461,5 +599,6 @@ def get_config_by_year(año):
             'entidades_paraestatales': ENTIDADES_PARAESTATALES_2026,
             'mapeo_ur': MAPEO_UR_2026_BASE,
             'fusion_urs': FUSION_URS_2026,
+            'tabla_ur': compilar_tabla_ur(MAPEO_UR_2026_BASE, FUSION_URS_2026),
             'usar_2026': True,
         }
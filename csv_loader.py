@@ -0,0 +1,460 @@
+# ============================================================================
+# CARGADOR DE ARCHIVOS CSV (MAP y SICOP)
+# ============================================================================
+
+import gzip
+import io
+import lzma
+import zipfile
+import zlib
+from contextlib import contextmanager
+
+import pandas as pd
+from config import MONTH_NAMES, MOTOR_CSV, a_centavos, detectar_fecha_archivo
+
+ENCODING_CSV = 'latin-1'
+
+# Incrementar al cambiar cualquier esquema: invalida los archivos en cache
+VERSION_ESQUEMA = 1
+
+# ============================================================================
+# ESQUEMAS DE COLUMNAS
+# ============================================================================
+# 'requeridas': columnas sin las cuales el procesador no puede trabajar.
+# 'opcionales': columnas que el procesador usa si vienen en el archivo.
+# Cualquier otra columna del CSV no se lee.
+
+PREFIJOS_MAP = ['ORI', 'AMP', 'RED', 'MOD', 'CONG', 'DESCONG', 'EJE']
+
+ESQUEMA_MAP_2025 = {
+    'requeridas': {
+        'UNIDAD': 'category',
+        'IDEN_PROY': 'category',
+        'PROYECTO': 'category',
+        'PARTIDA': 'str',
+    },
+    'opcionales': {
+        f'{prefix}_{month}': 'float64' for prefix in PREFIJOS_MAP for month in MONTH_NAMES
+    },
+}
+
+# Los cortes 2026 conservan el layout de 2025
+ESQUEMA_MAP_2026 = ESQUEMA_MAP_2025
+
+MESES_MODIFICACIONES_SICOP = ['EN', 'FE', 'MR', 'AB', 'MY', 'JN', 'JL', 'AG', 'SE', 'OC', 'NO', 'DI']
+MESES_RESERVAS_SICOP = ['ENE', 'FEB', 'MZO', 'ABR', 'MAY', 'JUN', 'JUL', 'AGO', 'SEP', 'OCT', 'NOV', 'DIC']
+
+ESQUEMA_SICOP_2025 = {
+    'requeridas': {
+        'ID_UNIDAD': 'category',
+        'CAPITULO': 'int8',
+        'CONCEPTO': 'int8',
+        'PARTIDA_GENERICA': 'int8',
+        'PARTIDA_ESPECIFICA': 'int8',
+        'CONTROL_OPERATIVO': 'int16',
+        'PROGRAMA_PRESUPUESTARIO': 'category',
+        'ORIGINAL': 'float64',
+        'MODIFICADO_AUTORIZADO': 'float64',
+        'RESERVAS': 'float64',
+    },
+    'opcionales': {
+        'EJERCIDO': 'float64',
+        'DEVENGADO': 'float64',
+        'EJERCIDO_TRAMITE': 'float64',
+        **{f'MO{abrev}': 'float64' for abrev in MESES_MODIFICACIONES_SICOP},
+        **{f'RESERVA_{mes}': 'float64' for mes in MESES_RESERVAS_SICOP},
+    },
+}
+
+ESQUEMA_SICOP_2026 = ESQUEMA_SICOP_2025
+
+
+def obtener_esquema(tipo, año):
+    """Obtiene el esquema de columnas del reporte según el año"""
+    if tipo == 'MAP':
+        return ESQUEMA_MAP_2025 if año <= 2025 else ESQUEMA_MAP_2026
+    if tipo == 'SICOP':
+        return ESQUEMA_SICOP_2025 if año <= 2025 else ESQUEMA_SICOP_2026
+    raise ValueError(f"Tipo de reporte desconocido: {tipo}")
+
+
+# Firmas de los formatos comprimidos aceptados
+FIRMAS_COMPRESION = {
+    b'\x1f\x8b': 'gzip',
+    b'\xfd7zXZ\x00': 'xz',
+    b'PK\x03\x04': 'zip',
+}
+EXTENSIONES_ACEPTADAS = ['csv', 'zip', 'gz', 'xz']
+
+# Filas que se leen para validar un archivo antes de procesarlo
+FILAS_MUESTRA = 20
+
+
+def detectar_compresion(archivo):
+    """Regresa 'gzip', 'xz', 'zip' o None según los primeros bytes del archivo"""
+    inicio = archivo.read(6)
+    archivo.seek(0)
+    for firma, compresion in FIRMAS_COMPRESION.items():
+        if inicio.startswith(firma):
+            return compresion
+    return None
+
+
+def _abrir_miembro_zip(contenedor):
+    """Abre el primer CSV dentro de un ZIP como flujo"""
+    miembros = [info for info in contenedor.infolist() if not info.is_dir()]
+    csvs = [info for info in miembros if info.filename.lower().endswith('.csv')]
+    if not miembros:
+        raise ValueError("El archivo ZIP está vacío")
+    return contenedor.open((csvs or miembros)[0])
+
+
+# Errores de un archivo comprimido dañado o incompleto (gzip.BadGzipFile es un OSError)
+ERRORES_DESCOMPRESION = (EOFError, gzip.BadGzipFile, zipfile.BadZipFile, lzma.LZMAError, zlib.error)
+
+
+@contextmanager
+def abrir_entrada(archivo, filename=None):
+    """
+    Abre una ruta o archivo binario como flujo de bytes del CSV.
+
+    Los archivos .gz, .xz y .zip se descomprimen sobre la marcha mientras el
+    lector de CSV consume el flujo; el contenido descomprimido nunca se
+    guarda completo en memoria. Solo se cierran los objetos abiertos aquí.
+
+    Los errores de descompresión, al abrir o al leer dentro del bloque with,
+    se convierten en ValueError con el nombre del archivo (`filename`).
+    """
+    propios = []
+    try:
+        if isinstance(archivo, (str, bytes)) or hasattr(archivo, '__fspath__'):
+            archivo = open(archivo, 'rb')
+            propios.append(archivo)
+
+        compresion = detectar_compresion(archivo)
+        if compresion == 'gzip':
+            entrada = gzip.GzipFile(fileobj=archivo, mode='rb')
+        elif compresion == 'xz':
+            entrada = lzma.LZMAFile(archivo, mode='rb')
+        elif compresion == 'zip':
+            contenedor = zipfile.ZipFile(archivo)
+            propios.append(contenedor)
+            entrada = _abrir_miembro_zip(contenedor)
+        else:
+            entrada = archivo
+        if entrada is not archivo:
+            propios.append(entrada)
+
+        yield entrada
+    except ERRORES_DESCOMPRESION as e:
+        nombre = filename or getattr(archivo, 'name', None) or 'el archivo'
+        raise ValueError(f"No se pudo descomprimir {nombre}: está dañado o incompleto ({e})") from e
+    finally:
+        for objeto in reversed(propios):
+            objeto.close()
+
+
+# DEFLATE comprime a lo más ~1032:1; con archivos .gz más chicos que esto el
+# ISIZE (tamaño módulo 2**32) no puede haber dado la vuelta
+GZIP_ISIZE_CONFIABLE = 2 ** 32 // 1032
+
+
+def _leer_varint(datos, posicion):
+    """Entero de longitud variable del formato xz; regresa (valor, siguiente posición)"""
+    valor = 0
+    desplazamiento = 0
+    while True:
+        byte = datos[posicion]
+        posicion += 1
+        valor |= (byte & 0x7F) << desplazamiento
+        if not byte & 0x80:
+            return valor, posicion
+        desplazamiento += 7
+
+
+def _tamaño_xz(contenido):
+    """Tamaño descomprimido según el índice de un .xz de un solo stream, o None si no se puede leer"""
+    try:
+        # Pie del stream: CRC32, tamaño del índice, banderas y 'YZ' (puede seguir relleno en ceros)
+        fin = len(contenido.rstrip(b'\x00'))
+        if fin < 24 or contenido[fin - 2:fin] != b'YZ':
+            return None
+        inicio_indice = fin - 12 - (int.from_bytes(contenido[fin - 8:fin - 4], 'little') + 1) * 4
+        if inicio_indice < 12 or contenido[inicio_indice] != 0:
+            return None
+        registros, posicion = _leer_varint(contenido, inicio_indice + 1)
+        total = 0
+        bloques = 0
+        for _ in range(registros):
+            sin_relleno, posicion = _leer_varint(contenido, posicion)
+            descomprimido, posicion = _leer_varint(contenido, posicion)
+            total += descomprimido
+            bloques += (sin_relleno + 3) // 4 * 4
+    except IndexError:
+        return None
+    # Si los bloques no llenan el archivo hay varios streams concatenados
+    return total if 12 + bloques == inicio_indice else None
+
+
+def _contar_descomprimido(contenido, limite=None):
+    """Cuenta los bytes del CSV descomprimiéndolo en flujo; se detiene al rebasar `limite`"""
+    total = 0
+    with abrir_entrada(io.BytesIO(contenido)) as entrada:
+        while True:
+            bloque = entrada.read(1024 ** 2)
+            if not bloque:
+                break
+            total += len(bloque)
+            if limite is not None and total > limite:
+                break
+    return total
+
+
+def tamaño_descomprimido(contenido, limite=None):
+    """
+    Tamaño en bytes del CSV contenido en `contenido` (bytes).
+
+    Se usa el tamaño registrado en el propio archivo (.zip, índice del .xz,
+    ISIZE del .gz cuando no puede haber dado la vuelta en 4 GiB). Si no es
+    confiable se cuenta descomprimiendo en flujo; con `limite` el conteo se
+    detiene en cuanto lo rebasa, así que basta para comparar contra un umbral.
+    """
+    compresion = detectar_compresion(io.BytesIO(contenido))
+    if compresion == 'zip':
+        try:
+            with zipfile.ZipFile(io.BytesIO(contenido)) as contenedor:
+                return max((info.file_size for info in contenedor.infolist()), default=0)
+        except zipfile.BadZipFile:
+            # abrir_entrada convierte el error en ValueError
+            return _contar_descomprimido(contenido, limite)
+    if compresion == 'gzip':
+        if len(contenido) < GZIP_ISIZE_CONFIABLE:
+            return int.from_bytes(contenido[-4:], 'little')
+        return _contar_descomprimido(contenido, limite)
+    if compresion == 'xz':
+        tamaño = _tamaño_xz(contenido)
+        return tamaño if tamaño is not None else _contar_descomprimido(contenido, limite)
+    return len(contenido)
+
+
+def excede_tamaño(contenido, limite):
+    """True si el CSV de `contenido` (bytes) pesa más de `limite` bytes ya descomprimido"""
+    return tamaño_descomprimido(contenido, limite) > limite
+
+
+def leer_encabezado(archivo):
+    """Lee solo la línea de encabezado del CSV y regresa sus columnas"""
+    columnas = pd.read_csv(archivo, encoding=ENCODING_CSV, nrows=0).columns.tolist()
+    if hasattr(archivo, 'seek'):
+        archivo.seek(0)
+    return columnas
+
+
+def columnas_mensuales(tipo, esquema):
+    """Columnas de montos mensuales del esquema: ORI_*, MOD_*, ... en MAP; MO* y RESERVA_* en SICOP"""
+    if tipo == 'MAP':
+        return set(esquema['opcionales'])
+    return {col for col in esquema['opcionales'] if col.startswith(('MO', 'RESERVA_'))}
+
+
+def clasificar_encabezado(columnas):
+    """
+    Regresa 'MAP' o 'SICOP' según las columnas del encabezado, o None si no coincide.
+
+    El encabezado debe traer todas las columnas requeridas del esquema de
+    algún año y al menos una columna de montos mensuales de ese esquema.
+    """
+    for tipo in ('MAP', 'SICOP'):
+        for año in (2025, 2026):
+            esquema = obtener_esquema(tipo, año)
+            mensuales = columnas_mensuales(tipo, esquema)
+            if all(col in columnas for col in esquema['requeridas']) and any(col in mensuales for col in columnas):
+                return tipo
+    return None
+
+
+def validar_columnas(columnas, tipo, esquema):
+    """Verifica que el encabezado tenga todas las columnas requeridas"""
+    faltantes = [col for col in esquema['requeridas'] if col not in columnas]
+    if faltantes:
+        raise ValueError(
+            f"El archivo no parece ser un reporte {tipo}: faltan las columnas "
+            f"{', '.join(faltantes)}"
+        )
+
+
+def _leer_con_pyarrow(archivo, tipos):
+    """Lee el CSV con el lector multihilo de Arrow y convierte una sola vez a pandas"""
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    tipos_arrow = {
+        'category': pa.dictionary(pa.int32(), pa.string()),
+        'str': pa.string(),
+        'int8': pa.int8(),
+        'int16': pa.int16(),
+        'float64': pa.float64(),
+    }
+    tabla = pa_csv.read_csv(
+        archivo,
+        read_options=pa_csv.ReadOptions(encoding=ENCODING_CSV, use_threads=True),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=list(tipos),
+            column_types={col: tipos_arrow[dtype] for col, dtype in tipos.items()},
+            strings_can_be_null=True,
+        ),
+    )
+    # self_destruct libera cada columna de Arrow en cuanto se convierte
+    df = tabla.to_pandas(split_blocks=True, self_destruct=True)
+    del tabla
+
+    # Mismo orden de categorías que el lector de pandas
+    for col, dtype in tipos.items():
+        if dtype == 'category':
+            df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+    return df
+
+
+def _tipos_a_leer(archivo, tipo, filename):
+    """Valida el encabezado y regresa {columna: dtype} de las columnas a leer"""
+    _, _, año_archivo = detectar_fecha_archivo(filename)
+    esquema = obtener_esquema(tipo, año_archivo)
+
+    columnas = leer_encabezado(archivo)
+    validar_columnas(columnas, tipo, esquema)
+
+    tipos = {**esquema['requeridas'], **esquema['opcionales']}
+    return {col: tipos[col] for col in columnas if col in tipos}
+
+
+def detectar_reporte(archivo, filename):
+    """
+    Detecta el tipo de reporte leyendo solo el encabezado y las primeras filas.
+
+    Permite rechazar o redirigir un archivo antes de leerlo completo: el tipo
+    se decide por las columnas del encabezado y las primeras FILAS_MUESTRA
+    filas se leen con los tipos del esquema para detectar valores inválidos.
+
+    Args:
+        archivo: ruta o archivo abierto en modo binario (CSV, .gz, .xz o .zip)
+        filename: nombre original del archivo (para detectar el año)
+
+    Returns:
+        Tupla (tipo, año): 'MAP' o 'SICOP' y el año de configuración aplicable
+    """
+    _, _, año_archivo = detectar_fecha_archivo(filename)
+
+    with abrir_entrada(archivo, filename) as entrada:
+        columnas = leer_encabezado(entrada)
+        tipo = clasificar_encabezado(columnas)
+        if tipo is None:
+            raise ValueError(
+                "El archivo no parece ser un reporte MAP (UNIDAD, IDEN_PROY, PROYECTO, PARTIDA y "
+                "columnas mensuales ORI_*, MOD_*, ...) ni SICOP (ID_UNIDAD, CAPITULO, CONTROL_OPERATIVO, "
+                "PROGRAMA_PRESUPUESTARIO, ... y columnas mensuales MO*, RESERVA_*)"
+            )
+
+        esquema = obtener_esquema(tipo, año_archivo)
+        tipos = {**esquema['requeridas'], **esquema['opcionales']}
+        tipos = {col: tipos[col] for col in columnas if col in tipos}
+        try:
+            pd.read_csv(entrada, encoding=ENCODING_CSV, usecols=list(tipos), dtype=tipos, nrows=FILAS_MUESTRA)
+        except ValueError as e:
+            raise ValueError(f"El archivo {tipo} tiene valores que no corresponden al esquema: {e}") from e
+
+    if hasattr(archivo, 'seek'):
+        archivo.seek(0)
+    return tipo, año_archivo
+
+
+def convertir_a_centavos(df):
+    """
+    Convierte a centavos enteros todas las columnas de montos (float64).
+
+    Las columnas con celdas vacías quedan como enteros con nulos (Int64), para
+    que las sumas y restas ignoren esas celdas igual que con NaN.
+    """
+    for col in df.columns[df.dtypes == 'float64']:
+        nulos = df[col].isna()
+        centavos = a_centavos(df[col])
+        if nulos.any():
+            centavos = centavos.astype('Int64').mask(nulos)
+        df[col] = centavos
+    return df
+
+
+def cargar_csv(archivo, tipo, filename, motor=None, centavos=False):
+    """
+    Lee un CSV de MAP o SICOP con los tipos declarados en su esquema.
+
+    Solo se leen las columnas que usa el procesador correspondiente.
+
+    Args:
+        archivo: ruta o archivo abierto en modo binario (CSV, .gz, .xz o .zip)
+        tipo: 'MAP' o 'SICOP'
+        filename: nombre original del archivo (para detectar el año)
+        motor: 'c' o 'pyarrow'; por omisión se usa MOTOR_CSV
+        centavos: si es True, los montos se regresan en centavos (int64)
+
+    Returns:
+        DataFrame con las columnas del esquema presentes en el archivo
+    """
+    motor = motor or MOTOR_CSV
+    if motor == 'pyarrow':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            motor = 'c'
+
+    with abrir_entrada(archivo, filename) as entrada:
+        tipos = _tipos_a_leer(entrada, tipo, filename)
+        try:
+            if motor == 'pyarrow':
+                df = _leer_con_pyarrow(entrada, tipos)
+            else:
+                df = pd.read_csv(
+                    entrada,
+                    encoding=ENCODING_CSV,
+                    usecols=list(tipos),
+                    dtype=tipos,
+                )
+        except ValueError as e:
+            raise ValueError(f"El archivo {tipo} tiene valores que no corresponden al esquema: {e}") from e
+
+    return convertir_a_centavos(df) if centavos else df
+
+
+def proyectar_columnas(df, tipo, año):
+    """
+    Regresa un DataFrame nuevo con solo las columnas del esquema presentes en `df`.
+
+    Con copy-on-write (activo en pandas 3 y activado por config en pandas 2.2)
+    la proyección comparte los datos de `df` sin copiarlos, y las columnas que
+    se agreguen o reemplacen no modifican `df`.
+    """
+    esquema = obtener_esquema(tipo, año)
+    columnas = [col for col in df.columns if col in esquema['requeridas'] or col in esquema['opcionales']]
+    return df[columnas]
+
+
+def iterar_csv(archivo, tipo, filename, tamaño_bloque, centavos=False):
+    """
+    Lee el CSV por bloques de `tamaño_bloque` filas con el mismo esquema que cargar_csv.
+
+    Regresa un generador de DataFrames; solo un bloque vive en memoria a la vez.
+    """
+    with abrir_entrada(archivo, filename) as entrada:
+        tipos = _tipos_a_leer(entrada, tipo, filename)
+        lector = pd.read_csv(
+            entrada,
+            encoding=ENCODING_CSV,
+            usecols=list(tipos),
+            dtype=tipos,
+            chunksize=tamaño_bloque,
+        )
+        try:
+            with lector:
+                for bloque in lector:
+                    yield convertir_a_centavos(bloque) if centavos else bloque
+        except ValueError as e:
+            raise ValueError(f"El archivo {tipo} tiene valores que no corresponden al esquema: {e}") from e
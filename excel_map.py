@@ -222,14 +222,9 @@ def generar_excel_map(resultados):
     # ESCRIBIR DATOS
     # =========================================================================
     
-    # Calcular subtotal subsidios
+    # Subtotal subsidios (calculado por procesar_map)
     programas_especificos = config['programas_especificos']
-    subtotal_subsidios = {
-        'Original': sum(programas[p]['Original'] for p in programas_especificos),
-        'ModificadoAnualNeto': sum(programas[p]['ModificadoAnualNeto'] for p in programas_especificos),
-        'ModificadoPeriodoNeto': sum(programas[p]['ModificadoPeriodoNeto'] for p in programas_especificos),
-        'Ejercido': sum(programas[p]['Ejercido'] for p in programas_especificos),
-    }
+    subtotal_subsidios = categorias['subsidios']
     
     # Fila 6: Totales
     escribir_fila_datos(6, 'Totales:', totales, es_total=True)
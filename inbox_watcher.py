@@ -0,0 +1,132 @@
+"""
+SADER - Sistema de Reportes Presupuestarios
+Servicio que vigila una carpeta de entrada y preprocesa los archivos MAP y SICOP
+
+Cada archivo nuevo se procesa en cuanto termina de copiarse y sus resultados
+(incluido el Excel) se guardan en el cache de resultados, de donde la
+aplicación los toma sin volver a procesar.
+
+Uso:
+    python inbox_watcher.py [carpeta] [--una-vez]
+
+Si no se indica la carpeta se usa SADER_INBOX_DIR.
+"""
+
+import io
+import logging
+import sys
+import time
+from pathlib import Path
+
+from config import DIRECTORIO_ENTRADA, INTERVALO_ENTRADA_S
+from cache import calcular_clave_resultado, cargar_resultado, guardar_resultado
+from csv_loader import EXTENSIONES_ACEPTADAS, detectar_reporte
+from batch_processor import procesar_lote
+
+log = logging.getLogger('sader.inbox')
+
+
+def listar_entrada(carpeta):
+    """Regresa {ruta: (tamaño, fecha de modificación)} de los archivos aceptados"""
+    archivos = {}
+    for ruta in Path(carpeta).iterdir():
+        extension = ruta.suffix.lower().lstrip('.')
+        if ruta.is_file() and not ruta.name.startswith('.') and extension in EXTENSIONES_ACEPTADAS:
+            try:
+                info = ruta.stat()
+            except FileNotFoundError:
+                continue
+            archivos[ruta] = (info.st_size, info.st_mtime_ns)
+    return archivos
+
+
+def procesar_pendientes(rutas):
+    """
+    Procesa los archivos que aún no tienen resultados en el cache.
+
+    Returns:
+        Número de archivos procesados
+    """
+    pendientes = {}
+    for ruta in rutas:
+        # Un archivo dañado o borrado se omite sin detener el servicio
+        try:
+            contenido = ruta.read_bytes()
+            tipo, _ = detectar_reporte(io.BytesIO(contenido), ruta.name)
+        except Exception as e:
+            log.warning("Se ignora %s: %s", ruta.name, e)
+            continue
+        clave = calcular_clave_resultado(contenido, tipo, ruta.name)
+        if cargar_resultado(clave) is not None:
+            log.info("%s ya estaba procesado", ruta.name)
+            continue
+        pendientes[ruta.name] = (clave, contenido)
+
+    if not pendientes:
+        return 0
+
+    inicio = time.perf_counter()
+    try:
+        salidas = procesar_lote([(filename, contenido) for filename, (_, contenido) in pendientes.items()])
+    except Exception as e:
+        # Por ejemplo, un proceso del pool que termina de forma anormal
+        log.error("Error al procesar el lote: %s", e)
+        return 0
+    for salida in salidas:
+        if salida['error'] is not None:
+            log.error("Error al procesar %s: %s", salida['filename'], salida['error'])
+            continue
+        clave, _ = pendientes[salida['filename']]
+        try:
+            guardar_resultado(clave, salida)
+        except Exception as e:
+            log.error("No se pudo guardar %s: %s", salida['filename'], e)
+            continue
+        log.info("%s procesado como %s", salida['filename'], salida['tipo'])
+    log.info("%d archivos en %.1f s", len(salidas), time.perf_counter() - inicio)
+    return len(salidas)
+
+
+def vigilar(carpeta, intervalo=INTERVALO_ENTRADA_S, una_vez=False):
+    """
+    Revisa la carpeta cada `intervalo` segundos y procesa los archivos nuevos.
+
+    Un archivo se procesa cuando su tamaño y fecha no cambian entre dos
+    revisiones seguidas, para no leer archivos que todavía se están copiando.
+    """
+    carpeta = Path(carpeta)
+    log.info("Vigilando %s cada %.0f s", carpeta, intervalo)
+
+    vistos = {}
+    anteriores = {} if not una_vez else listar_entrada(carpeta)
+    while True:
+        actuales = listar_entrada(carpeta)
+        estables = [
+            ruta for ruta, firma in actuales.items()
+            if anteriores.get(ruta) == firma and vistos.get(ruta) != firma
+        ]
+        if estables:
+            procesar_pendientes(estables)
+            for ruta in estables:
+                vistos[ruta] = actuales[ruta]
+
+        if una_vez:
+            return
+        anteriores = actuales
+        time.sleep(intervalo)
+
+
+def main(argv):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    una_vez = '--una-vez' in argv
+    argumentos = [arg for arg in argv if arg != '--una-vez']
+    carpeta = argumentos[0] if argumentos else DIRECTORIO_ENTRADA
+    if not carpeta or not Path(carpeta).is_dir():
+        print(__doc__)
+        return 1
+    vigilar(carpeta, una_vez=una_vez)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -6,24 +6,372 @@ import pandas as pd
 import numpy as np
 from datetime import date
 from config import (
-    MONTH_NAMES, UR_MAP, round_like_excel, detectar_fecha_archivo,
-    get_config_by_year, numero_a_letras_mx
+    MONTH_NAMES, round_like_excel, round_like_excel_array, detectar_fecha_archivo,
+    get_config_by_year, numero_a_letras_mx, centavos_a_pesos, montos_a_pesos,
+    mapear_distintos, resolver_ur, LINEAS_CUADRO_MAP, PROGRAMAS_CON_CONGELADOS
 )
+from csv_loader import proyectar_columnas
 
+# Montos de cada línea del cuadro
+COLUMNAS_CUADRO = ['Original', 'ModificadoAnualNeto', 'ModificadoPeriodoNeto', 'Ejercido']
 
-def sum_columns(df, prefix, months_to_use):
-    """Suma las columnas de un prefijo para los meses especificados"""
-    cols = [f'{prefix}_{month}' for month in months_to_use if f'{prefix}_{month}' in df.columns]
-    if not cols:
-        return pd.Series([0] * len(df))
-    result = df[cols].fillna(0).sum(axis=1)
-    return result.apply(lambda x: round_like_excel(x, 2))
+# Montos de cada línea que dependen del mes del periodo
+COLUMNAS_PERIODO = ['ModificadoPeriodoNeto', 'CongeladoPeriodo', 'DisponiblePeriodoNeto']
 
+# Prefijos mensuales que entran al cuadro (AMP y RED no se usan)
+PREFIJOS_CUADRO = ['ORI', 'MOD', 'CONG', 'DESCONG', 'EJE']
 
-def procesar_map(df, filename):
+# Llaves y montos del cubo de desglose (ver armar_cubo)
+LLAVES_CUBO = ['Pp', 'Capitulo', 'NuevaUR', 'PARTIDA']
+COLUMNAS_CUBO = ['Original', 'ModificadoAnualNeto', 'CongeladoAnual', 'Ejercido', 'DisponibleAnualNeto']
+
+# Montos de cada línea que se comparan entre cortes
+COLUMNAS_COMPARACION = [
+    'Original', 'ModificadoAnualNeto', 'ModificadoPeriodoNeto', 'CongeladoAnual', 'CongeladoPeriodo', 'Ejercido',
+]
+
+
+def redondear(valores, centavos=False):
+    """Redondea montos en pesos a 2 decimales; los montos en centavos ya son exactos"""
+    return valores if centavos else round_like_excel_array(valores, 2)
+
+
+def matriz_meses(df, centavos=False, redondear_base=False):
+    """
+    Carga las columnas PREFIJO_MES en un arreglo denso (filas × prefijo × mes).
+    
+    El orden de los prefijos es el de PREFIJOS_CUADRO y el de los meses el de
+    MONTH_NAMES; las columnas que no vienen en el archivo quedan en cero. Con
+    redondear_base=True cada columna se redondea al cargarla, sin copias del
+    arreglo completo.
+    """
+    dtype = np.int64 if centavos else np.float64
+    matriz = np.zeros((len(df), len(PREFIJOS_CUADRO), len(MONTH_NAMES)), dtype=dtype)
+    for i, prefix in enumerate(PREFIJOS_CUADRO):
+        for j, month in enumerate(MONTH_NAMES):
+            col = f'{prefix}_{month}'
+            if col in df.columns:
+                valores = df[col].fillna(0).to_numpy(dtype=dtype)
+                matriz[:, i, j] = round_like_excel_array(valores, 2) if redondear_base else valores
+    return matriz
+
+
+def claves_programa(df, fusion):
+    """
+    Construye Pp_Original y Pp como categóricas.
+    
+    La clave IDEN_PROY + PROYECTO (a 3 dígitos) se arma solo para los pares
+    distintos y la fusión de programas se aplica a las categorías, no a las filas.
+    
+    Returns:
+        Tupla (Pp_Original, Pp) de Series categóricas
+    """
+    iden = df['IDEN_PROY'].astype('category').cat
+    proy = df['PROYECTO'].astype('category').cat
+    
+    # Un entero por par (código IDEN_PROY, código PROYECTO); los nulos tienen código -1
+    n_proy = len(proy.categories) + 1
+    pares = iden.codes.to_numpy(np.int64) * n_proy + proy.codes.to_numpy(np.int64) + 1
+    codigos, pares_distintos = pd.factorize(pares)
+    
+    textos_iden = [str(v) for v in iden.categories] + ['nan']
+    textos_proy = [str(v).zfill(3) for v in proy.categories] + ['nan']
+    claves = np.asarray([
+        textos_iden[i] + textos_proy[j]
+        for i, j in zip(pares_distintos // n_proy, pares_distintos % n_proy - 1)
+    ], dtype=object)
+    
+    # Dos pares distintos pueden dar la misma clave; las categorías deben ser únicas
+    originales, inverso = np.unique(claves, return_inverse=True)
+    codigos_original = inverso[codigos]
+    
+    fusionadas, inverso_fusion = np.unique(
+        np.asarray([fusion.get(pp, pp) for pp in originales], dtype=object), return_inverse=True
+    )
+    
+    pp_original = pd.Series(pd.Categorical.from_codes(codigos_original, originales), index=df.index)
+    pp = pd.Series(pd.Categorical.from_codes(inverso_fusion[codigos_original], fusionadas), index=df.index)
+    return pp_original, pp
+
+
+def etiquetar_lineas(df, programas_especificos):
+    """
+    Asigna a cada fila el número de su línea del cuadro.
+    
+    Las líneas son las categorías por capítulo de LINEAS_CUADRO_MAP seguidas
+    de un programa específico por línea; las filas de un programa específico
+    van a la línea del programa sin importar su capítulo. Las filas que no
+    entran al cuadro llevan -1.
+    
+    Returns:
+        Tupla (etiquetas, nombres) con el arreglo de etiquetas por fila y el
+        nombre de cada línea
+    """
+    por_capitulo = {
+        categoria: capitulos for categoria, capitulos in LINEAS_CUADRO_MAP.items() if capitulos is not None
+    }
+    nombres = list(por_capitulo) + list(programas_especificos)
+    
+    linea_capitulo = {cap: i for i, capitulos in enumerate(por_capitulo.values()) for cap in capitulos}
+    linea_programa = {prog: len(por_capitulo) + i for i, prog in enumerate(programas_especificos)}
+    
+    etiqueta_capitulo = mapear_distintos(df['Capitulo'], lambda cap: linea_capitulo.get(cap, -1))
+    etiqueta_programa = mapear_distintos(df['Pp'], lambda pp: linea_programa.get(pp, -1))
+    etiquetas = np.where(etiqueta_programa >= 0, etiqueta_programa, etiqueta_capitulo)
+    return etiquetas, nombres
+
+
+def sumar_lineas(datos, etiquetas, nombres):
+    """
+    Suma las columnas de `datos` por línea del cuadro con un solo groupby.
+    
+    Returns:
+        DataFrame indexado por nombre de línea; solo incluye las líneas con filas
+    """
+    sumas = datos.groupby(etiquetas).sum()
+    sumas = sumas[sumas.index >= 0]
+    sumas.index = [nombres[i] for i in sumas.index]
+    return sumas
+
+
+def pivot_linea(sumas, nombre, columnas=COLUMNAS_CUADRO):
+    """Montos de una línea del cuadro redondeados a 2 decimales; 0 si la línea no tiene filas"""
+    if nombre not in sumas.index:
+        return {col: 0 for col in columnas}
+    return {col: round(sumas.at[nombre, col], 2) for col in columnas}
+
+
+def armar_cuadro(lineas, programas_especificos, columnas=COLUMNAS_CUADRO):
+    """
+    Arma las categorías, programas y totales del cuadro a partir de sus líneas.
+    
+    El subtotal de subsidios es la suma de las líneas de los programas
+    específicos y el total la suma de las categorías, en el orden de
+    LINEAS_CUADRO_MAP.
+    
+    Returns:
+        Tupla (categorias, programas, totales)
+    """
+    programas = {prog: dict(lineas[prog]) for prog in programas_especificos}
+    categorias = {}
+    for categoria, capitulos in LINEAS_CUADRO_MAP.items():
+        if capitulos is None:
+            categorias[categoria] = {
+                col: sum(programas[p][col] for p in programas_especificos)
+                for col in columnas
+            }
+        else:
+            categorias[categoria] = dict(lineas[categoria])
+    totales = {col: sum(datos[col] for datos in categorias.values()) for col in columnas}
+    return categorias, programas, totales
+
+
+def cuadro_en_pesos(categorias, programas, totales):
+    """Convierte a pesos los montos del cuadro calculado en centavos"""
+    return (
+        {cat: montos_a_pesos(datos) for cat, datos in categorias.items()},
+        {prog: montos_a_pesos(datos) for prog, datos in programas.items()},
+        montos_a_pesos(totales),
+    )
+
+
+def periodos_por_mes(acumulado, ejercido, etiquetas, nombres, centavos=False):
+    """
+    Sumas por línea del cuadro de los montos del periodo con corte a cada mes.
+    
+    Para cada mes se calculan por fila ModificadoPeriodoNeto, CongeladoPeriodo
+    y DisponiblePeriodoNeto igual que en procesar_map y se suman por línea, de
+    modo que recortar_periodo puede armar el cuadro de cualquier mes. Los 12
+    meses se calculan juntos y se suman con un solo groupby.
+    
+    Returns:
+        dict {mes (1 a 12): DataFrame de sumas por línea, ver sumar_lineas}
+    """
+    indice = PREFIJOS_CUADRO.index
+    modificado_bruto = redondear(acumulado[:, indice('MOD'), :], centavos)
+    congelado = redondear(
+        redondear(acumulado[:, indice('CONG'), :], centavos) -
+        redondear(acumulado[:, indice('DESCONG'), :], centavos),
+        centavos
+    )
+    modificado_neto = redondear(modificado_bruto - congelado, centavos)
+    disponible = redondear(modificado_neto - ejercido[:, np.newaxis], centavos)
+    
+    meses = range(1, len(MONTH_NAMES) + 1)
+    datos = pd.DataFrame(
+        np.hstack([modificado_neto, congelado, disponible]),
+        columns=pd.MultiIndex.from_product([COLUMNAS_PERIODO, meses]),
+    )
+    sumas = sumar_lineas(datos, etiquetas, nombres)
+    return {mes: sumas.xs(mes, axis=1, level=1) for mes in meses}
+
+
+def recortar_periodo(resultados, mes):
+    """
+    Recalcula el cuadro de procesar_map con el periodo al mes indicado.
+    
+    Usa las sumas por línea y mes guardadas en resultados['periodos']; no se
+    vuelve a leer ni a procesar el archivo.
+    
+    Args:
+        resultados: dict regresado por procesar_map
+        mes: mes del periodo (1 a 12)
+    
+    Returns:
+        Copia de `resultados` con 'categorias', 'programas' y 'totales' al mes
+        indicado; cada línea incluye además 'CongeladoPeriodo' y
+        'DisponiblePeriodoNeto'. metadata['mes_periodo'] queda en `mes`.
+    """
+    periodos = resultados['periodos']
+    metadata = resultados['metadata']
+    sumas_mes = periodos['meses'][mes]
+    
+    lineas = {}
+    for nombre, datos in periodos['lineas'].items():
+        lineas[nombre] = {**datos, **pivot_linea(sumas_mes, nombre, COLUMNAS_PERIODO)}
+    
+    columnas = COLUMNAS_CUADRO + [col for col in COLUMNAS_PERIODO if col not in COLUMNAS_CUADRO]
+    categorias, programas, totales = armar_cuadro(lineas, metadata['config']['programas_especificos'], columnas)
+    if metadata['centavos']:
+        categorias, programas, totales = cuadro_en_pesos(categorias, programas, totales)
+    
+    recortado = dict(resultados)
+    recortado.update({
+        'categorias': categorias,
+        'programas': programas,
+        'totales': totales,
+        'metadata': {**metadata, 'mes_periodo': mes},
+    })
+    return recortado
+
+
+def armar_cubo(df, centavos=False):
+    """
+    Sumas por programa, capítulo, UR y partida para el desglose del cuadro.
+    
+    El índice queda ordenado, así que las consultas con desglosar_cubo no
+    recorren las filas del archivo. Los montos son anuales y en pesos, con el
+    mismo redondeo que el cuadro (en centavos las sumas ya son exactas).
+    """
+    cubo = df.groupby(LLAVES_CUBO, observed=True, sort=True)[COLUMNAS_CUBO].sum()
+    if centavos:
+        return centavos_a_pesos(cubo)
+    return round_like_excel_array(cubo, 2)
+
+
+def desglosar_cubo(cubo, nivel, **filtros):
+    """
+    Suma el cubo por uno de sus niveles dentro de los filtros indicados.
+    
+    Ejemplo: desglosar_cubo(cubo, 'NuevaUR', Pp='S263') da los montos del
+    programa S263 por UR.
+    
+    Suma directamente sobre los códigos del nivel en el índice en lugar de
+    usar groupby: da el mismo resultado en un cuarto del tiempo (menos de 1 ms
+    contra 2-3 ms en un cubo de 6k renglones).
+    """
+    seleccion = cubo
+    for llave, valor in filtros.items():
+        seleccion = seleccion.xs(valor, level=llave, drop_level=False)
+    
+    posicion = seleccion.index.names.index(nivel)
+    presentes, grupos = np.unique(seleccion.index.codes[posicion], return_inverse=True)
+    montos = seleccion.to_numpy()
+    sumas = np.column_stack([
+        np.bincount(grupos, weights=montos[:, j], minlength=len(presentes))
+        for j in range(montos.shape[1])
+    ])
+    indice = seleccion.index.levels[posicion][presentes].rename(nivel)
+    return pd.DataFrame(round_like_excel_array(sumas, 2), index=indice, columns=seleccion.columns)
+
+
+def lineas_corte(resultados):
+    """
+    Montos de cada línea del cuadro de un corte procesado con procesar_map.
+    
+    Returns:
+        DataFrame indexado por (sección, línea) con las columnas de
+        COLUMNAS_COMPARACION; la sección es 'categorias', 'programas' o 'totales'
+    """
+    periodo = recortar_periodo(resultados, resultados['metadata']['mes_periodo'])
+    anual = recortar_periodo(resultados, len(MONTH_NAMES))
+    
+    filas = {}
+    for seccion in ('categorias', 'programas'):
+        for linea, datos in periodo[seccion].items():
+            filas[(seccion, linea)] = {**datos, 'CongeladoAnual': anual[seccion][linea]['CongeladoPeriodo']}
+    filas[('totales', 'total')] = {**periodo['totales'], 'CongeladoAnual': anual['totales']['CongeladoPeriodo']}
+    
+    lineas = pd.DataFrame.from_dict(filas, orient='index')[COLUMNAS_COMPARACION]
+    lineas.index.names = ['Seccion', 'Linea']
+    return lineas
+
+
+def comparar_cortes_map(cortes):
+    """
+    Alinea por línea del cuadro varios cortes MAP y calcula sus diferencias.
+    
+    Trabaja sobre los resultados ya procesados de cada corte (incluso en modo
+    ligero o tomados del cache de resultados), sin volver a las filas.
+    
+    Args:
+        cortes: lista de dicts regresados por procesar_map
+    
+    Returns:
+        dict con:
+        - 'montos': DataFrame indexado por (sección, línea) con columnas
+          (concepto, corte), cortes en orden de fecha
+        - 'diferencias': DataFrame con la diferencia de cada corte contra el
+          anterior, columnas (concepto, 'corte anterior → corte')
+        - 'cortes': etiquetas de los cortes en orden
+        Las líneas que no existen en un corte (programas de otro año) quedan en NaN.
+    """
+    cortes = sorted(cortes, key=lambda resultados: resultados['metadata']['fecha_archivo'])
+    etiquetas = []
+    for resultados in cortes:
+        etiqueta = resultados['metadata']['fecha_archivo'].strftime('%d/%m/%Y')
+        repetidos = sum(1 for previa in etiquetas if previa.split(' (')[0] == etiqueta)
+        etiquetas.append(f'{etiqueta} ({repetidos + 1})' if repetidos else etiqueta)
+    
+    tablas = [lineas_corte(resultados) for resultados in cortes]
+    indice = tablas[0].index
+    for tabla in tablas[1:]:
+        indice = indice.union(tabla.index, sort=False)
+    # Los programas de otro año se agregan al final de su sección
+    orden_seccion = {'categorias': 0, 'programas': 1, 'totales': 2}
+    indice = indice[np.argsort([orden_seccion[seccion] for seccion in indice.get_level_values(0)], kind='stable')]
+    
+    # valores[línea, concepto, corte]
+    valores = np.stack([tabla.reindex(indice).to_numpy(dtype=np.float64) for tabla in tablas], axis=2)
+    diferencias = np.diff(valores, axis=2)
+    diferencias = np.where(np.isnan(diferencias), np.nan, round_like_excel_array(diferencias, 2))
+    
+    pares = [f'{anterior} → {actual}' for anterior, actual in zip(etiquetas, etiquetas[1:])]
+    return {
+        'montos': pd.DataFrame(
+            valores.reshape(len(indice), -1), index=indice,
+            columns=pd.MultiIndex.from_product([COLUMNAS_COMPARACION, etiquetas], names=['Concepto', 'Corte'])
+        ),
+        'diferencias': pd.DataFrame(
+            diferencias.reshape(len(indice), -1), index=indice,
+            columns=pd.MultiIndex.from_product([COLUMNAS_COMPARACION, pares], names=['Concepto', 'Corte'])
+        ),
+        'cortes': etiquetas,
+    }
+
+
+def procesar_map(df, filename, centavos=False, ligero=False):
     """
     Procesa el archivo MAP y devuelve los resultados calculados.
     
+    Con centavos=True los montos de `df` vienen en centavos enteros (ver
+    csv_loader.convertir_a_centavos): todas las sumas son exactas y los
+    resultados se convierten a pesos al final.
+    
+    Con ligero=True se trabaja sobre una proyección de las columnas del
+    esquema, `df` no se modifica y 'df_procesado' es None; solo se regresan
+    los agregados que usan el dashboard y el Excel.
+    
     Returns:
         dict con:
         - 'resumen': DataFrame con totales por concepto
@@ -37,156 +385,127 @@ def procesar_map(df, filename):
     config = get_config_by_year(año_archivo)
     
     current_month_index = mes_archivo - 1
-    months_up_to_current = MONTH_NAMES[0:current_month_index + 1]
     
     año_actual = date.today().year
     es_cierre_año_anterior = (mes_archivo in [1, 2]) and (año_archivo < año_actual)
     
-    # Mapear URs
-    df['NuevaUR'] = df['UNIDAD'].apply(
-        lambda x: 811 if x == 'G00' else UR_MAP.get(int(x) if str(x).isdigit() else 0, int(x) if str(x).isdigit() else 0)
-    )
+    if ligero:
+        df = proyectar_columnas(df, 'MAP', año_archivo)
     
-    # Calcular Programa Presupuestario
-    df['Pp_Original'] = df['IDEN_PROY'].astype(str) + df['PROYECTO'].astype(str).str.zfill(3)
+    # Mapear URs con la misma tabla que el SICOP (solo se resuelven los valores distintos de UNIDAD)
+    df['NuevaUR'] = mapear_distintos(df['UNIDAD'], lambda x: resolver_ur(x, config['tabla_ur']), categorica=True)
     
-    # Aplicar fusión de programas
-    fusion = config['fusion_programas']
-    df['Pp'] = df['Pp_Original'].apply(lambda pp: fusion.get(pp, pp))
+    # Calcular Programa Presupuestario con la fusión de programas aplicada
+    df['Pp_Original'], df['Pp'] = claves_programa(df, config['fusion_programas'])
     
     # Calcular Capítulo y Partida
     df['PARTIDA'] = pd.to_numeric(df['PARTIDA'], errors='coerce').fillna(0).astype(int)
     df['Capitulo'] = (df['PARTIDA'] // 10000) * 1000
     
     # Redondear valores base
-    for prefix in ['ORI', 'AMP', 'RED', 'MOD', 'CONG', 'DESCONG', 'EJE']:
-        for month in MONTH_NAMES:
-            col = f'{prefix}_{month}'
-            if col in df.columns:
-                df[col] = df[col].fillna(0).apply(lambda x: round_like_excel(x, 2))
+    cols_base = [
+        f'{prefix}_{month}'
+        for prefix in ['ORI', 'AMP', 'RED', 'MOD', 'CONG', 'DESCONG', 'EJE']
+        for month in MONTH_NAMES
+        if f'{prefix}_{month}' in df.columns
+    ]
+    if not centavos and not ligero:
+        # Columna por columna para no crear copias del bloque completo
+        for col in cols_base:
+            df[col] = round_like_excel_array(df[col].to_numpy(dtype=np.float64), 2)
+    
+    # Sumas acumuladas por mes: la suma hasta el mes m es acumulado[:, prefijo, m].
+    # En modo ligero los valores base se redondean en la matriz y no en df; la
+    # suma acumulada se hace sobre la misma matriz
+    acumulado = matriz_meses(df, centavos, redondear_base=ligero and not centavos)
+    np.cumsum(acumulado, axis=2, out=acumulado)
+    ultimo_mes = len(MONTH_NAMES) - 1
+    mes_periodo = ultimo_mes if es_cierre_año_anterior else current_month_index
+    
+    def suma_hasta(prefix, mes):
+        return redondear(acumulado[:, PREFIJOS_CUADRO.index(prefix), mes], centavos)
     
     # Calcular totales
-    df['Original'] = sum_columns(df, 'ORI', MONTH_NAMES)
-    df['OriginalPeriodo'] = sum_columns(df, 'ORI', months_up_to_current)
+    df['Original'] = suma_hasta('ORI', ultimo_mes)
+    df['OriginalPeriodo'] = suma_hasta('ORI', current_month_index)
     
     # Modificado
-    df['ModificadoAnualBruto'] = sum_columns(df, 'MOD', MONTH_NAMES)
-    
-    if es_cierre_año_anterior:
-        df['ModificadoPeriodoBruto'] = sum_columns(df, 'MOD', MONTH_NAMES)
-    else:
-        df['ModificadoPeriodoBruto'] = sum_columns(df, 'MOD', months_up_to_current)
+    df['ModificadoAnualBruto'] = suma_hasta('MOD', ultimo_mes)
+    df['ModificadoPeriodoBruto'] = suma_hasta('MOD', mes_periodo)
     
     # Congelados
-    cong_anual = sum_columns(df, 'CONG', MONTH_NAMES)
-    descong_anual = sum_columns(df, 'DESCONG', MONTH_NAMES)
-    
-    if es_cierre_año_anterior:
-        cong_periodo = sum_columns(df, 'CONG', MONTH_NAMES)
-        descong_periodo = sum_columns(df, 'DESCONG', MONTH_NAMES)
-    else:
-        cong_periodo = sum_columns(df, 'CONG', months_up_to_current)
-        descong_periodo = sum_columns(df, 'DESCONG', months_up_to_current)
-    
-    df['CongeladoAnual'] = (cong_anual - descong_anual).apply(lambda x: round_like_excel(x, 2))
-    df['CongeladoPeriodo'] = (cong_periodo - descong_periodo).apply(lambda x: round_like_excel(x, 2))
+    df['CongeladoAnual'] = redondear(suma_hasta('CONG', ultimo_mes) - suma_hasta('DESCONG', ultimo_mes), centavos)
+    df['CongeladoPeriodo'] = redondear(suma_hasta('CONG', mes_periodo) - suma_hasta('DESCONG', mes_periodo), centavos)
     
     # Modificado Neto
-    mod_anual_sum = sum_columns(df, 'MOD', MONTH_NAMES)
-    df['ModificadoAnualNeto'] = (mod_anual_sum - df['CongeladoAnual']).apply(lambda x: round_like_excel(x, 2))
+    df['ModificadoAnualNeto'] = redondear(df['ModificadoAnualBruto'] - df['CongeladoAnual'], centavos)
     
     if es_cierre_año_anterior:
         df['ModificadoPeriodoNeto'] = df['ModificadoAnualNeto'].copy()
     else:
-        mod_periodo_sum = sum_columns(df, 'MOD', months_up_to_current)
-        df['ModificadoPeriodoNeto'] = (mod_periodo_sum - df['CongeladoPeriodo']).apply(lambda x: round_like_excel(x, 2))
+        df['ModificadoPeriodoNeto'] = redondear(df['ModificadoPeriodoBruto'] - df['CongeladoPeriodo'], centavos)
     
     # Ejercido
-    df['Ejercido'] = sum_columns(df, 'EJE', MONTH_NAMES)
+    df['Ejercido'] = suma_hasta('EJE', ultimo_mes)
     
     # Disponibles
-    df['DisponibleAnualNeto'] = (df['ModificadoAnualNeto'] - df['Ejercido']).apply(lambda x: round_like_excel(x, 2))
-    df['DisponiblePeriodoNeto'] = (df['ModificadoPeriodoNeto'] - df['Ejercido']).apply(lambda x: round_like_excel(x, 2))
+    df['DisponibleAnualNeto'] = redondear(df['ModificadoAnualNeto'] - df['Ejercido'], centavos)
+    df['DisponiblePeriodoNeto'] = redondear(df['ModificadoPeriodoNeto'] - df['Ejercido'], centavos)
     
-    # Crear pivots
+    # Sumar todas las líneas del cuadro en un solo groupby
     programas_especificos = config['programas_especificos']
-    
-    def crear_pivot_suma(filtro_func):
-        filtered = df[filtro_func(df)]
-        if len(filtered) == 0:
-            return {'Original': 0, 'ModificadoAnualNeto': 0, 'ModificadoPeriodoNeto': 0, 'Ejercido': 0}
-        return {
-            'Original': round(filtered['Original'].sum(), 2),
-            'ModificadoAnualNeto': round(filtered['ModificadoAnualNeto'].sum(), 2),
-            'ModificadoPeriodoNeto': round(filtered['ModificadoPeriodoNeto'].sum(), 2),
-            'Ejercido': round(filtered['Ejercido'].sum(), 2)
-        }
-    
-    # Pivots por categoría
-    pivot_cap1000 = crear_pivot_suma(lambda d: (d['Capitulo'] == 1000) & (~d['Pp'].isin(programas_especificos)))
-    pivot_cap2000_3000 = crear_pivot_suma(lambda d: (d['Capitulo'].isin([2000, 3000])) & (~d['Pp'].isin(programas_especificos)))
-    pivot_cap4000 = crear_pivot_suma(lambda d: (d['Capitulo'] == 4000) & (~d['Pp'].isin(programas_especificos)))
-    pivot_cap5000_7000 = crear_pivot_suma(lambda d: (d['Capitulo'].isin([5000, 7000])) & (~d['Pp'].isin(programas_especificos)))
-    
-    # Pivots por programa
-    pivot_programas = {}
-    for prog in programas_especificos:
-        pivot_programas[prog] = crear_pivot_suma(lambda d, p=prog: d['Pp'] == p)
+    etiquetas, nombres_lineas = etiquetar_lineas(df, programas_especificos)
+    sumas = sumar_lineas(df[COLUMNAS_CUADRO + ['CongeladoAnual']], etiquetas, nombres_lineas)
+    lineas = {nombre: pivot_linea(sumas, nombre) for nombre in nombres_lineas}
     
     # Congelados por programa (para notas)
-    programas_con_congelados = ['S263', 'S293', 'S304']
     congelados_programas = {}
     textos_congelados = {}
-    for prog in programas_con_congelados:
-        df_prog = df[df['Pp'] == prog]
-        congelados_programas[prog] = round_like_excel(df_prog['CongeladoAnual'].sum(), 2) if len(df_prog) > 0 else 0
+    for prog in PROGRAMAS_CON_CONGELADOS:
+        if prog in programas_especificos:
+            congelado = round_like_excel(sumas.at[prog, 'CongeladoAnual'], 2) if prog in sumas.index else 0
+        else:
+            # Programa sin línea propia en el cuadro
+            df_prog = df[df['Pp'] == prog]
+            congelado = round_like_excel(df_prog['CongeladoAnual'].sum(), 2) if len(df_prog) > 0 else 0
+        congelados_programas[prog] = centavos_a_pesos(congelado) if centavos else congelado
         textos_congelados[prog] = numero_a_letras_mx(congelados_programas[prog])
     
-    # Subtotal subsidios
-    subtotal_subsidios = {
-        'Original': sum(pivot_programas[p]['Original'] for p in programas_especificos),
-        'ModificadoAnualNeto': sum(pivot_programas[p]['ModificadoAnualNeto'] for p in programas_especificos),
-        'ModificadoPeriodoNeto': sum(pivot_programas[p]['ModificadoPeriodoNeto'] for p in programas_especificos),
-        'Ejercido': sum(pivot_programas[p]['Ejercido'] for p in programas_especificos),
-    }
+    # Categorías (con el subtotal de subsidios), programas y totales
+    categorias, pivot_programas, total_datos = armar_cuadro(lineas, programas_especificos)
     
-    # Totales
-    total_datos = {
-        'Original': (pivot_cap1000['Original'] + pivot_cap2000_3000['Original'] +
-                     subtotal_subsidios['Original'] +
-                     pivot_cap4000['Original'] + pivot_cap5000_7000['Original']),
-        'ModificadoAnualNeto': (pivot_cap1000['ModificadoAnualNeto'] + pivot_cap2000_3000['ModificadoAnualNeto'] +
-                                subtotal_subsidios['ModificadoAnualNeto'] +
-                                pivot_cap4000['ModificadoAnualNeto'] + pivot_cap5000_7000['ModificadoAnualNeto']),
-        'ModificadoPeriodoNeto': (pivot_cap1000['ModificadoPeriodoNeto'] + pivot_cap2000_3000['ModificadoPeriodoNeto'] +
-                                  subtotal_subsidios['ModificadoPeriodoNeto'] +
-                                  pivot_cap4000['ModificadoPeriodoNeto'] + pivot_cap5000_7000['ModificadoPeriodoNeto']),
-        'Ejercido': (pivot_cap1000['Ejercido'] + pivot_cap2000_3000['Ejercido'] +
-                     subtotal_subsidios['Ejercido'] +
-                     pivot_cap4000['Ejercido'] + pivot_cap5000_7000['Ejercido']),
+    if centavos:
+        # Los resultados se entregan en pesos; df_procesado conserva los centavos
+        categorias, pivot_programas, total_datos = cuadro_en_pesos(categorias, pivot_programas, total_datos)
+    
+    # Cubo para el desglose programa → capítulo → UR → partida
+    cubo = armar_cubo(df, centavos)
+    
+    # Sumas por línea con el periodo a cada mes (ver recortar_periodo)
+    periodos = {
+        'lineas': lineas,
+        'meses': periodos_por_mes(acumulado, df['Ejercido'].to_numpy(), etiquetas, nombres_lineas, centavos),
     }
     
     return {
-        'categorias': {
-            'servicios_personales': pivot_cap1000,
-            'gasto_corriente': pivot_cap2000_3000,
-            'subsidios': subtotal_subsidios,
-            'otros_programas': pivot_cap4000,
-            'bienes_muebles': pivot_cap5000_7000,
-        },
+        'categorias': categorias,
         'programas': pivot_programas,
         'congelados': {
             'valores': congelados_programas,
             'textos': textos_congelados,
         },
         'totales': total_datos,
+        'periodos': periodos,
+        'cubo': cubo,
         'metadata': {
             'fecha_archivo': fecha_archivo,
             'mes': mes_archivo,
+            'mes_periodo': mes_periodo + 1,
             'año': año_archivo,
             'registros': len(df),
             'es_cierre': es_cierre_año_anterior,
+            'centavos': centavos,
             'config': config,
         },
-        'df_procesado': df,
+        'df_procesado': None if ligero else df,
     }
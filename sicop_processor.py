@@ -6,9 +6,38 @@ import pandas as pd
 import numpy as np
 from datetime import date
 from config import (
-    MONTH_NAMES, round_like_excel, detectar_fecha_archivo,
-    get_config_by_year, numero_a_letras_mx
+    MONTH_NAMES, round_like_excel, round_like_excel_array, detectar_fecha_archivo,
+    get_config_by_year, numero_a_letras_mx, centavos_a_pesos, montos_a_pesos, mapear_distintos, resolver_ur,
+    TOP_PARTIDAS_UR
 )
+from csv_loader import iterar_csv, proyectar_columnas
+
+# Filtros del reporte
+PARTIDAS_EXCLUIDAS = [39801, 39810]
+CAPITULOS_EXCLUIDOS = [1, 7]
+CONTROLES_OPERATIVOS_VALIDOS = [0, 10, 40, 50, 51]
+
+# Controles operativos que suman al modificado y al ejercido de cada UR: las
+# entidades paraestatales, los órganos desconcentrados y RJL no suman el 51
+CONTROLES_UR_RESTRINGIDA = [0, 50]
+CONTROLES_UR_GENERAL = [0, 50, 51]
+
+# Capítulos del desglose por UR del dashboard
+CAPITULOS_DETALLE = [2, 3, 4]
+
+# Modo por bloques: filas por bloque y llaves de las sumas parciales
+TAMAÑO_BLOQUE_SICOP = 200_000
+LLAVES_AGREGADO_SICOP = ['Nueva UR', 'CONTROL_OPERATIVO', 'CAPITULO', 'Partida', 'PROGRAMA_PRESUPUESTARIO']
+COLUMNAS_SUMA_SICOP = ['ORIGINAL', 'MODIFICADO_AUTORIZADO', 'RESERVAS', 'Modificado_neto', 'EJERCIDO_REAL', 'REGISTROS']
+
+# Columnas del resumen que son montos (el resto son porcentajes)
+COLUMNAS_MONTO_RESUMEN = [
+    'Original', 'Modificado_anual', 'Modificado_periodo', 'Ejercido_acumulado',
+    'Disponible_anual', 'Disponible_periodo',
+]
+
+# Secciones del reporte (llaves de get_config_by_year) en el orden en que se presentan
+SECCIONES_SICOP = ['sector_central', 'oficinas', 'organos_desconcentrados', 'entidades_paraestatales']
 
 
 def obtener_columnas_hasta_mes(mes_numero):
@@ -25,47 +54,332 @@ def obtener_columnas_hasta_mes(mes_numero):
     }
 
 
-def calcular_congelado_anual(df):
-    """Calcula el total de recursos congelados en el año"""
+def calcular_congelado_anual(df, filas=None):
+    """Calcula el total de recursos congelados en el año (solo `filas` si se indica una máscara)"""
     todos_meses = ['ENE', 'FEB', 'MZO', 'ABR', 'MAY', 'JUN', 'JUL', 'AGO', 'SEP', 'OCT', 'NOV', 'DIC']
     cols = [f'RESERVA_{mes}' for mes in todos_meses if f'RESERVA_{mes}' in df.columns]
     if cols:
-        return round_like_excel(df[cols].sum(axis=1).sum(), 2)
+        sumas = df[cols].sum(axis=1)
+        return round_like_excel((sumas if filas is None else sumas[filas]).sum(), 2)
     return 0
 
 
-def calcular_congelado_periodo(df, mes_numero):
-    """Calcula el total de recursos congelados hasta el mes indicado"""
+def calcular_congelado_periodo(df, mes_numero, filas=None):
+    """Calcula el total de recursos congelados hasta el mes indicado (solo `filas` si se indica una máscara)"""
     cols_a_usar = obtener_columnas_hasta_mes(mes_numero)
     cols = [col for col in cols_a_usar['reservas'] if col in df.columns]
     if cols:
-        return round_like_excel(df[cols].sum(axis=1).sum(), 2)
+        sumas = df[cols].sum(axis=1)
+        return round_like_excel((sumas if filas is None else sumas[filas]).sum(), 2)
     return 0
 
 
 def mapear_ur(id_unidad, config):
-    """Mapea una UR original a la UR correspondiente según el año"""
-    id_str = str(id_unidad)
-    mapeo_base = config['mapeo_ur']
-    fusion_urs = config.get('fusion_urs', {})
+    """Mapea una UR original a la UR correspondiente según el año (mapeo base y fusión, ver config['tabla_ur'])"""
+    return resolver_ur(id_unidad, config['tabla_ur'])
+
+
+def preparar_sicop(df, config):
+    """
+    Agrega al DataFrame las columnas derivadas: Nueva UR, Partida, EJERCIDO_REAL y Modificado_neto.
+    
+    ID_UNIDAD y Nueva UR quedan como categóricas de texto (csv_loader ya lee
+    ID_UNIDAD y PROGRAMA_PRESUPUESTARIO como categóricas y los códigos como
+    enteros de 8 y 16 bits); Partida queda en int32.
+    """
+    # Aplicar mapeo de URs sobre los valores distintos de ID_UNIDAD
+    unidades = df['ID_UNIDAD']
+    if not isinstance(unidades.dtype, pd.CategoricalDtype):
+        unidades = unidades.astype(str).astype('category')
+    elif not pd.api.types.is_string_dtype(unidades.cat.categories):
+        unidades = unidades.cat.rename_categories(str)
+    df['ID_UNIDAD'] = unidades
+    df['Nueva UR'] = mapear_distintos(unidades, lambda x: mapear_ur(x, config), categorica=True)
     
-    # Primero aplicar mapeo base
-    if id_unidad in mapeo_base:
-        id_str = str(mapeo_base[id_unidad])
-    elif id_str.isdigit() and int(id_str) in mapeo_base:
-        id_str = str(mapeo_base[int(id_str)])
+    # Calcular Partida
+    df['Partida'] = (
+        df['CAPITULO'].astype(np.int32) * 10000 + df['CONCEPTO'].astype(np.int32) * 1000 +
+        df['PARTIDA_GENERICA'].astype(np.int32) * 100 + df['PARTIDA_ESPECIFICA'].astype(np.int32) * 10
+    )
     
-    # Luego aplicar fusión si es 2026
-    if config['usar_2026'] and id_str in fusion_urs:
-        return fusion_urs[id_str]
+    # Calcular EJERCIDO_REAL
+    for col in ['EJERCIDO', 'DEVENGADO', 'EJERCIDO_TRAMITE']:
+        if col not in df.columns:
+            df[col] = 0
+        else:
+            df[col] = df[col].fillna(0)
+    
+    df['EJERCIDO_REAL'] = df['EJERCIDO'] + df['DEVENGADO'] + df['EJERCIDO_TRAMITE']
     
-    return id_str
+    # Modificado neto
+    df['Modificado_neto'] = df['MODIFICADO_AUTORIZADO'] - df['RESERVAS']
+    
+    return df
+
+
+def obtener_urs_validas(config):
+    """Lista de URs que se reportan, en el orden de las secciones"""
+    return (config['sector_central'] + config['oficinas'] +
+            config['organos_desconcentrados'] + config['entidades_paraestatales'])
 
 
-def procesar_sicop(df, filename):
+def urs_restringidas(config):
+    """URs cuyo modificado y ejercido solo suman los controles CONTROLES_UR_RESTRINGIDA"""
+    return set(config['entidades_paraestatales']) | set(config['organos_desconcentrados']) | {'RJL'}
+
+
+def mascaras_reporte(df, urs_validas):
+    """
+    Filas que entran a los cálculos del reporte, sin copiar el DataFrame.
+    
+    Returns:
+        Tupla (principal, congelados) de máscaras booleanas: congelados son
+        las URs válidas sin partidas excluidas ni capítulo 1; principal además
+        quita CAPITULOS_EXCLUIDOS y los controles operativos no válidos
+    """
+    congelados = (
+        df['Nueva UR'].isin(urs_validas) &
+        ~df['Partida'].isin(PARTIDAS_EXCLUIDAS) &
+        (df['CAPITULO'] != 1)
+    )
+    principal = (
+        congelados &
+        ~df['CAPITULO'].isin(CAPITULOS_EXCLUIDOS) &
+        df['CONTROL_OPERATIVO'].isin(CONTROLES_OPERATIVOS_VALIDOS)
+    )
+    return principal, congelados
+
+
+def control_operativo(df, filas=None):
+    """CONTROL_OPERATIVO de `df`; las filas fuera de la máscara `filas` quedan en NaN y no cumplen ningún filtro"""
+    co = df['CONTROL_OPERATIVO']
+    return co if filas is None else co.where(filas)
+
+
+def mascara_modificado(df, config, filas=None):
+    """Filas que suman al modificado y al ejercido de su UR según el tipo de UR"""
+    co = control_operativo(df, filas)
+    restringida = df['Nueva UR'].isin(urs_restringidas(config))
+    return co.isin(CONTROLES_UR_RESTRINGIDA) | (co.isin(CONTROLES_UR_GENERAL) & ~restringida)
+
+
+def sumas_periodo(df, mes_numero):
+    """
+    Suma por fila de las modificaciones y de las reservas hasta el mes indicado.
+    
+    Returns:
+        Tupla (modificaciones, reservas) de Series; en cero si el archivo no
+        trae las columnas
+    """
+    cols_a_usar = obtener_columnas_hasta_mes(mes_numero)
+    sumas = []
+    for columnas in (cols_a_usar['modificaciones'], cols_a_usar['reservas']):
+        presentes = [col for col in columnas if col in df.columns]
+        sumas.append(df[presentes].sum(axis=1) if presentes else pd.Series(0, index=df.index))
+    return tuple(sumas)
+
+
+def resumen_por_ur(df, config, mes_archivo, es_cierre_año_anterior, filas=None, incluida=None, periodo=None):
+    """
+    Original, modificado anual, modificado al periodo y ejercido de cada UR válida.
+    
+    Las filas que no cuentan para un concepto se dejan en NaN y todas las URs
+    se suman en un solo groupby; cada suma se redondea como round_like_excel.
+    Con `filas` solo cuentan las filas de esa máscara. `incluida`
+    (mascara_modificado) y `periodo` (sumas_periodo) se calculan si no se pasan.
+    
+    Returns:
+        DataFrame indexado por UR en el orden de obtener_urs_validas; las URs
+        sin registros quedan en 0
+    """
+    co = control_operativo(df, filas)
+    if incluida is None:
+        incluida = mascara_modificado(df, config, filas)
+    
+    columnas = {
+        'Original': df['ORIGINAL'].where(co == 0),
+        'Modificado_anual': df['Modificado_neto'].where(incluida),
+        'Ejercido': df['EJERCIDO_REAL'].where(incluida),
+    }
+    periodo_anual = es_cierre_año_anterior or mes_archivo == 12
+    if not periodo_anual:
+        mod_bruto, cong_periodo = periodo if periodo is not None else sumas_periodo(df, mes_archivo)
+        columnas['Modificado_bruto'] = mod_bruto.where(incluida)
+        columnas['Congelado_periodo'] = cong_periodo.where(incluida)
+    
+    sumas = pd.DataFrame(columnas, index=df.index).groupby(df['Nueva UR'], observed=True).sum()
+    
+    resumen = pd.DataFrame(index=sumas.index)
+    resumen['Original'] = round_like_excel_array(sumas['Original'], 2)
+    resumen['Modificado_anual'] = round_like_excel_array(sumas['Modificado_anual'], 2)
+    if periodo_anual:
+        resumen['Modificado_periodo'] = resumen['Modificado_anual']
+    else:
+        resumen['Modificado_periodo'] = round_like_excel_array(sumas['Modificado_bruto'] - sumas['Congelado_periodo'], 2)
+    resumen['Ejercido'] = round_like_excel_array(sumas['Ejercido'], 2)
+    return resumen.reindex(obtener_urs_validas(config), fill_value=0)
+
+
+def porcentajes_avance(tabla):
+    """
+    Agrega Pct_avance_anual y Pct_avance_periodo (ejercido / modificado; 0 si el modificado es 0).
+    
+    Solo se agregan los porcentajes cuyo modificado está en la tabla.
+    """
+    for sufijo in ('anual', 'periodo'):
+        if f'Modificado_{sufijo}' not in tabla.columns:
+            continue
+        modificado = tabla[f'Modificado_{sufijo}']
+        tabla[f'Pct_avance_{sufijo}'] = (tabla['Ejercido_acumulado'] / modificado).where(modificado != 0, 0.0)
+    return tabla
+
+
+def consolidar_secciones(tabla, config, niveles=(), columnas=None):
+    """
+    Subtotales por sección y total general de una tabla por UR.
+    
+    Cada UR se etiqueta con su sección de SECCIONES_SICOP (las URs sin sección
+    no entran) y todas las secciones se suman en un solo groupby; el total
+    general es la suma de los subtotales. `niveles` son columnas bajo la UR
+    que se conservan, por ejemplo ['CAPITULO'] para subtotales por sección y
+    capítulo.
+    
+    Args:
+        tabla: DataFrame con la columna 'UR', las de `niveles` y las de `columnas`
+        columnas: columnas a sumar; por omisión todas las numéricas de `tabla`
+            salvo las de `niveles` y los porcentajes de avance
+    
+    Returns:
+        DataFrame indexado por (Seccion, *niveles), con las secciones en orden y
+        'total' al final, con las columnas sumadas y los porcentajes de avance.
+        Sin niveles las secciones sin URs quedan en 0; con niveles se omiten
+    """
+    niveles = list(niveles)
+    if columnas is None:
+        columnas = [
+            col for col in tabla.select_dtypes('number').columns
+            if col not in niveles and not col.startswith('Pct_avance_')
+        ]
+    seccion_por_ur = {ur: seccion for seccion in SECCIONES_SICOP for ur in config[seccion]}
+    seccion = tabla['UR'].map(seccion_por_ur).rename('Seccion')
+    
+    subtotales = tabla[columnas].groupby([seccion] + [tabla[nivel] for nivel in niveles], sort=False).sum()
+    if niveles:
+        subtotales = subtotales.reindex(SECCIONES_SICOP, level='Seccion')
+        total = pd.concat({'total': subtotales.groupby(level=niveles, sort=False).sum()}, names=['Seccion'])
+    else:
+        subtotales = subtotales.reindex(SECCIONES_SICOP, fill_value=0)
+        total = subtotales.sum().to_frame('total').T
+    consolidado = pd.concat([subtotales, total]).rename_axis(['Seccion'] + niveles)
+    return porcentajes_avance(consolidado)
+
+
+def calcular_capitulos_por_ur(df, config, mes_archivo, capitulos=CAPITULOS_DETALLE, filas=None, incluida=None,
+                              periodo=None):
+    """
+    Original, modificado, ejercido y disponible de cada UR válida por capítulo.
+    
+    El modificado se toma de las filas con control operativo 10 y el ejercido
+    de las filas de mascara_modificado; todas las URs y capítulos se suman en
+    un solo groupby por (UR, CAPITULO). Con `filas` solo cuentan las filas de
+    esa máscara.
+    
+    Returns:
+        dict {UR: {capítulo (str): montos}} con todas las URs válidas y todos
+        los capítulos de `capitulos`
+    """
+    if incluida is None:
+        incluida = mascara_modificado(df, config, filas)
+    mod_bruto, cong_periodo = periodo if periodo is not None else sumas_periodo(df, mes_archivo)
+    modificable = control_operativo(df, filas) == 10
+    
+    columnas = pd.DataFrame({
+        'Original': df['ORIGINAL'].where(modificable),
+        'Modificado_anual': df['MODIFICADO_AUTORIZADO'].where(modificable),
+        'Modificado_bruto': mod_bruto.where(modificable),
+        'Congelado_periodo': cong_periodo.where(modificable),
+        'Ejercido_acumulado': df['EJERCIDO_REAL'].where(incluida),
+    }, index=df.index)
+    sumas = columnas.groupby([df['Nueva UR'], df['CAPITULO']], observed=True).sum()
+    
+    tabla = pd.DataFrame(index=sumas.index)
+    tabla['Original'] = round_like_excel_array(sumas['Original'], 2)
+    tabla['Modificado_anual'] = round_like_excel_array(sumas['Modificado_anual'], 2)
+    tabla['Modificado_periodo'] = round_like_excel_array(sumas['Modificado_bruto'] - sumas['Congelado_periodo'], 2)
+    tabla['Ejercido_acumulado'] = round_like_excel_array(sumas['Ejercido_acumulado'], 2)
+    tabla['Disponible_periodo'] = round_like_excel_array(tabla['Modificado_periodo'] - tabla['Ejercido_acumulado'], 2)
+    
+    urs_validas = obtener_urs_validas(config)
+    tabla = tabla.reindex(pd.MultiIndex.from_product([urs_validas, capitulos]), fill_value=0.0)
+    montos = tabla.to_dict('index')
+    return {ur: {str(cap): montos[(ur, cap)] for cap in capitulos} for ur in urs_validas}
+
+
+def top_partidas_por_ur(df, config, catalogo_partidas, top=TOP_PARTIDAS_UR, filas=None, incluida=None):
+    """
+    Partidas con mayor disponible anual (modificado - ejercido) de cada UR válida.
+    
+    Todas las URs se suman en un solo groupby por (UR, partida, programa); solo
+    cuentan las combinaciones con modificado (control operativo 10) y
+    disponible positivo.
+    
+    Args:
+        catalogo_partidas: dict partida -> denominación
+        top: partidas por UR
+        filas: máscara de las filas que cuentan (None = todas)
+    
+    Returns:
+        dict {UR: [montos de cada partida, de mayor a menor disponible]}
+    """
+    if incluida is None:
+        incluida = mascara_modificado(df, config, filas)
+    modificable = control_operativo(df, filas) == 10
+    llaves = ['Nueva UR', 'Partida', 'PROGRAMA_PRESUPUESTARIO']
+    
+    columnas = pd.DataFrame({
+        'ORIGINAL': df['ORIGINAL'].where(modificable),
+        'MODIFICADO_AUTORIZADO': df['MODIFICADO_AUTORIZADO'].where(modificable),
+        'EJERCIDO_REAL': df['EJERCIDO_REAL'].where(incluida),
+        'modificable': modificable,
+    }, index=df.index)
+    sumas = columnas.groupby([df[llave] for llave in llaves], observed=True).sum()
+    sumas = sumas[sumas['modificable'] > 0]
+    sumas['Disponible'] = sumas['MODIFICADO_AUTORIZADO'] - sumas['EJERCIDO_REAL']
+    
+    # Mayor disponible de cada UR: orden estable y las primeras `top` filas por grupo
+    sumas = sumas[sumas['Disponible'] > 0].sort_values('Disponible', ascending=False, kind='stable')
+    sumas = sumas.groupby(level='Nueva UR', observed=True, sort=False).head(top).reset_index()
+    
+    partida = sumas['Partida'].astype(int)
+    programa = sumas['PROGRAMA_PRESUPUESTARIO'].astype(object)
+    partidas = pd.DataFrame({
+        'Partida': partida,
+        'Denominacion': partida.map(catalogo_partidas).fillna(''),
+        'Programa': programa,
+        'Denom_Programa': programa.map(config.get('programas_nombres', {})).fillna(''),
+        'Original': round_like_excel_array(sumas['ORIGINAL'], 2),
+        'Modificado': round_like_excel_array(sumas['MODIFICADO_AUTORIZADO'], 2),
+        'Ejercido': round_like_excel_array(sumas['EJERCIDO_REAL'], 2),
+        'Disponible': round_like_excel_array(sumas['Disponible'], 2),
+    })
+    por_ur = {ur: [] for ur in obtener_urs_validas(config)}
+    for ur, fila in zip(sumas['Nueva UR'], partidas.to_dict('records')):
+        if ur in por_ur:
+            por_ur[ur].append(fila)
+    return por_ur
+
+
+def procesar_sicop(df, filename, centavos=False, ligero=False):
     """
     Procesa el archivo SICOP y devuelve los resultados calculados.
     
+    Con centavos=True los montos de `df` vienen en centavos enteros (ver
+    csv_loader.convertir_a_centavos): todas las sumas son exactas y los
+    resultados se convierten a pesos al final.
+    
+    Con ligero=True se trabaja sobre una proyección de las columnas del
+    esquema, `df` no se modifica y 'df_procesado' es None.
+    
     Returns:
         dict con:
         - 'resumen': DataFrame con totales por UR
@@ -74,161 +388,129 @@ def procesar_sicop(df, filename):
         - 'totales': dict con totales generales
         - 'metadata': información del archivo
     """
-    # Detectar fecha y configuración
-    fecha_archivo, mes_archivo, año_archivo = detectar_fecha_archivo(filename)
+    _, _, año_archivo = detectar_fecha_archivo(filename)
     config = get_config_by_year(año_archivo)
     
-    año_actual = date.today().year
-    es_cierre_año_anterior = (mes_archivo in [1, 2]) and (año_archivo < año_actual)
+    if ligero:
+        df = proyectar_columnas(df, 'SICOP', año_archivo)
+    preparar_sicop(df, config)
     
-    # Aplicar mapeo de URs
-    df['ID_UNIDAD'] = df['ID_UNIDAD'].astype(str)
-    df['Nueva UR'] = df['ID_UNIDAD'].apply(lambda x: mapear_ur(x, config))
+    # Los filtros se aplican como máscaras sobre el mismo DataFrame, sin copias
+    principal, congelados = mascaras_reporte(df, obtener_urs_validas(config))
     
-    # Calcular Partida
-    df['Partida'] = (
-        df['CAPITULO'] * 10000 + df['CONCEPTO'] * 1000 +
-        df['PARTIDA_GENERICA'] * 100 + df['PARTIDA_ESPECIFICA'] * 10
-    ).astype(int)
+    resultados = calcular_resultados_sicop(df, filename, centavos, filas=principal, filas_congelados=congelados)
+    # Las filas del reporte solo se copian si se piden
+    resultados['df_procesado'] = None if ligero else df.loc[principal]
+    return resultados
+
+
+def procesar_sicop_por_bloques(archivo, filename, tamaño_bloque=TAMAÑO_BLOQUE_SICOP, centavos=False):
+    """
+    Procesa un archivo SICOP leyéndolo por bloques, para exportaciones que no caben en memoria.
     
-    # Calcular EJERCIDO_REAL
-    for col in ['EJERCIDO', 'DEVENGADO', 'EJERCIDO_TRAMITE']:
-        if col not in df.columns:
-            df[col] = 0
-        else:
-            df[col] = df[col].fillna(0)
+    Cada bloque se mapea y filtra igual que en procesar_sicop y se reduce a sumas
+    parciales por (UR, control operativo, capítulo, partida, programa). Como todos
+    los cálculos del reporte son sumas sobre esos grupos, el resultado es el mismo
+    que el de procesar_sicop; la memoria depende del tamaño de bloque y no del
+    tamaño del archivo.
     
-    df['EJERCIDO_REAL'] = df['EJERCIDO'] + df['DEVENGADO'] + df['EJERCIDO_TRAMITE']
+    Returns:
+        dict igual al de procesar_sicop, con 'df_procesado' = None
+    """
+    _, _, año_archivo = detectar_fecha_archivo(filename)
+    config = get_config_by_year(año_archivo)
+    urs_validas = obtener_urs_validas(config)
     
-    # URs válidas
-    urs_validas = (config['sector_central'] + config['oficinas'] + 
-                   config['organos_desconcentrados'] + config['entidades_paraestatales'])
+    acumulado = None
+    for bloque in iterar_csv(archivo, 'SICOP', filename, tamaño_bloque, centavos=centavos):
+        preparar_sicop(bloque, config)
+        
+        # Filtros comunes a los cálculos principales y a congelados
+        _, congelados = mascaras_reporte(bloque, urs_validas)
+        bloque = bloque[congelados]
+        parcial = _sumar_por_grupo(bloque)
+        acumulado = parcial if acumulado is None else _sumar_por_grupo(_concatenar_categoricas(acumulado, parcial))
     
-    # Guardar copia para congelados antes de filtrar
-    df_para_congelados = df.copy()
+    if acumulado is None:
+        raise ValueError("El archivo SICOP no contiene registros")
     
-    # Aplicar filtros
-    df = df[df['Nueva UR'].astype(str).isin(urs_validas)].copy()
-    df = df[~df['Partida'].isin([39801, 39810])].copy()
-    df = df[~df['CAPITULO'].isin([1, 7])].copy()
-    df = df[df['CONTROL_OPERATIVO'].isin([0, 10, 40, 50, 51])].copy()
+    principal, _ = mascaras_reporte(acumulado, urs_validas)
+    resultados = calcular_resultados_sicop(acumulado, filename, centavos, filas=principal)
+    resultados['df_procesado'] = None
+    return resultados
+
+
+def _concatenar_categoricas(*marcos):
+    """pd.concat que conserva las columnas categóricas aunque cada bloque traiga otras categorías"""
+    marcos = [marco.copy(deep=False) for marco in marcos]
+    for col in marcos[0].columns:
+        if isinstance(marcos[0][col].dtype, pd.CategoricalDtype):
+            categorias = marcos[0][col].cat.categories
+            for marco in marcos[1:]:
+                categorias = categorias.union(marco[col].cat.categories)
+            for marco in marcos:
+                marco[col] = marco[col].cat.set_categories(categorias)
+    return pd.concat(marcos, ignore_index=True)
+
+
+def _sumar_por_grupo(df):
+    """Reduce filas a sumas por las llaves que distinguen los cálculos del reporte"""
+    columnas_mes = obtener_columnas_hasta_mes(12)
+    columnas_mes = columnas_mes['modificaciones'] + columnas_mes['reservas']
+    columnas_suma = [col for col in df.columns if col in COLUMNAS_SUMA_SICOP or col in columnas_mes]
+    grupos = df.groupby(LLAVES_AGREGADO_SICOP, observed=True, dropna=False, sort=False)
+    agregado = grupos[columnas_suma].sum()
+    if 'REGISTROS' not in df.columns:
+        agregado['REGISTROS'] = grupos.size()
+    return agregado.reset_index()
+
+
+def calcular_resultados_sicop(df, filename, centavos=False, filas=None, filas_congelados=None):
+    """
+    Calcula el resumen por UR, subtotales, congelados y datos de dashboard.
     
-    # Calcular por UR
-    resultados_ur = {}
+    `filas` y `filas_congelados` son las máscaras de mascaras_reporte sobre
+    `df` (None = todas las filas). `df` pueden ser filas del archivo o sumas
+    parciales por grupo (ver procesar_sicop_por_bloques). Con centavos=True
+    los cálculos se hacen en centavos y los montos se regresan en pesos. No
+    incluye 'df_procesado'; lo agrega quien llama.
+    """
+    # Detectar fecha y configuración
+    fecha_archivo, mes_archivo, año_archivo = detectar_fecha_archivo(filename)
+    config = get_config_by_year(año_archivo)
     
-    for ur in urs_validas:
-        df_ur = df[df['Nueva UR'].astype(str) == ur].copy()
-        
-        if len(df_ur) == 0:
-            resultados_ur[ur] = {
-                'Original': 0, 'Modificado_anual': 0, 'Modificado_periodo': 0, 'Ejercido': 0
-            }
-            continue
-        
-        # Calcular Modificado neto
-        df_ur['Modificado_neto'] = df_ur['MODIFICADO_AUTORIZADO'] - df_ur['RESERVAS']
-        
-        # ORIGINAL: Suma donde CO=0
-        df_co0 = df_ur[df_ur['CONTROL_OPERATIVO'] == 0]
-        original = round_like_excel(df_co0['ORIGINAL'].sum(), 2)
-        
-        # MODIFICADO: Filtros de CO según tipo de UR
-        if ur in config['entidades_paraestatales'] or ur == 'RJL':
-            df_modificado = df_ur[df_ur['CONTROL_OPERATIVO'].isin([0, 50])]
-        elif ur in config['organos_desconcentrados']:
-            df_modificado = df_ur[df_ur['CONTROL_OPERATIVO'].isin([0, 50])]
-        else:
-            df_modificado = df_ur[df_ur['CONTROL_OPERATIVO'].isin([0, 50, 51])]
-        
-        # MODIFICADO ANUAL
-        modificado_anual = round_like_excel(df_modificado['Modificado_neto'].sum(), 2)
-        
-        # MODIFICADO PERIODO
-        if es_cierre_año_anterior or mes_archivo == 12:
-            modificado_periodo = modificado_anual
-        else:
-            cols_a_usar = obtener_columnas_hasta_mes(mes_archivo)
-            cols_mod = [col for col in cols_a_usar['modificaciones'] if col in df_modificado.columns]
-            cols_res = [col for col in cols_a_usar['reservas'] if col in df_modificado.columns]
-            
-            mod_bruto = df_modificado[cols_mod].sum(axis=1).sum() if cols_mod else 0
-            cong_periodo = df_modificado[cols_res].sum(axis=1).sum() if cols_res else 0
-            modificado_periodo = round_like_excel(mod_bruto - cong_periodo, 2)
-        
-        # EJERCIDO
-        if ur in config['entidades_paraestatales'] or ur == 'RJL':
-            df_ejercido = df_ur[df_ur['CONTROL_OPERATIVO'].isin([0, 50])]
-        elif ur in config['organos_desconcentrados']:
-            df_ejercido = df_ur[df_ur['CONTROL_OPERATIVO'].isin([0, 50])]
-        else:
-            df_ejercido = df_ur[df_ur['CONTROL_OPERATIVO'].isin([0, 50, 51])]
-        
-        ejercido = round_like_excel(df_ejercido['EJERCIDO_REAL'].sum(), 2)
-        
-        resultados_ur[ur] = {
-            'Original': original,
-            'Modificado_anual': modificado_anual,
-            'Modificado_periodo': modificado_periodo,
-            'Ejercido': ejercido
-        }
+    año_actual = date.today().year
+    es_cierre_año_anterior = (mes_archivo in [1, 2]) and (año_archivo < año_actual)
     
-    # Crear DataFrame de resumen
-    resumen = pd.DataFrame.from_dict(resultados_ur, orient='index').reset_index()
-    resumen.columns = ['UR', 'Original', 'Modificado_anual', 'Modificado_periodo', 'Ejercido_acumulado']
+    if 'REGISTROS' in df.columns:
+        registros = int((df['REGISTROS'] if filas is None else df['REGISTROS'][filas]).sum())
+    else:
+        registros = len(df) if filas is None else int(filas.sum())
     
-    # Calcular disponibles y porcentajes
-    resumen['Disponible_anual'] = resumen.apply(
-        lambda row: round_like_excel(row['Modificado_anual'] - row['Ejercido_acumulado'], 2), axis=1
-    )
-    resumen['Disponible_periodo'] = resumen.apply(
-        lambda row: round_like_excel(row['Modificado_periodo'] - row['Ejercido_acumulado'], 2), axis=1
-    )
-    resumen['Pct_avance_anual'] = resumen.apply(
-        lambda row: row['Ejercido_acumulado'] / row['Modificado_anual'] if row['Modificado_anual'] != 0 else 0, axis=1
-    )
-    resumen['Pct_avance_periodo'] = resumen.apply(
-        lambda row: row['Ejercido_acumulado'] / row['Modificado_periodo'] if row['Modificado_periodo'] != 0 else 0, axis=1
+    # Calcular por UR
+    incluida = mascara_modificado(df, config, filas)
+    periodo = sumas_periodo(df, mes_archivo)
+    resumen = resumen_por_ur(
+        df, config, mes_archivo, es_cierre_año_anterior, filas=filas, incluida=incluida, periodo=periodo
     )
+    resumen = resumen.rename(columns={'Ejercido': 'Ejercido_acumulado'}).rename_axis('UR').reset_index()
     
-    # Calcular subtotales por sección
-    def calcular_subtotal(urs_lista):
-        df_seccion = resumen[resumen['UR'].isin(urs_lista)]
-        subtotal = {
-            'Original': df_seccion['Original'].sum(),
-            'Modificado_anual': df_seccion['Modificado_anual'].sum(),
-            'Modificado_periodo': df_seccion['Modificado_periodo'].sum(),
-            'Ejercido_acumulado': df_seccion['Ejercido_acumulado'].sum(),
-            'Disponible_anual': df_seccion['Disponible_anual'].sum(),
-            'Disponible_periodo': df_seccion['Disponible_periodo'].sum(),
-        }
-        subtotal['Pct_avance_anual'] = subtotal['Ejercido_acumulado'] / subtotal['Modificado_anual'] if subtotal['Modificado_anual'] != 0 else 0
-        subtotal['Pct_avance_periodo'] = subtotal['Ejercido_acumulado'] / subtotal['Modificado_periodo'] if subtotal['Modificado_periodo'] != 0 else 0
-        return subtotal
-    
-    subtotal_sc = calcular_subtotal(config['sector_central'])
-    subtotal_of = calcular_subtotal(config['oficinas'])
-    subtotal_od = calcular_subtotal(config['organos_desconcentrados'])
-    subtotal_ep = calcular_subtotal(config['entidades_paraestatales'])
-    
-    # Total general
-    total_general = {
-        'Original': subtotal_sc['Original'] + subtotal_of['Original'] + subtotal_od['Original'] + subtotal_ep['Original'],
-        'Modificado_anual': subtotal_sc['Modificado_anual'] + subtotal_of['Modificado_anual'] + subtotal_od['Modificado_anual'] + subtotal_ep['Modificado_anual'],
-        'Modificado_periodo': subtotal_sc['Modificado_periodo'] + subtotal_of['Modificado_periodo'] + subtotal_od['Modificado_periodo'] + subtotal_ep['Modificado_periodo'],
-        'Ejercido_acumulado': subtotal_sc['Ejercido_acumulado'] + subtotal_of['Ejercido_acumulado'] + subtotal_od['Ejercido_acumulado'] + subtotal_ep['Ejercido_acumulado'],
-        'Disponible_anual': subtotal_sc['Disponible_anual'] + subtotal_of['Disponible_anual'] + subtotal_od['Disponible_anual'] + subtotal_ep['Disponible_anual'],
-        'Disponible_periodo': subtotal_sc['Disponible_periodo'] + subtotal_of['Disponible_periodo'] + subtotal_od['Disponible_periodo'] + subtotal_ep['Disponible_periodo'],
-    }
-    total_general['Pct_avance_anual'] = total_general['Ejercido_acumulado'] / total_general['Modificado_anual'] if total_general['Modificado_anual'] != 0 else 0
-    total_general['Pct_avance_periodo'] = total_general['Ejercido_acumulado'] / total_general['Modificado_periodo'] if total_general['Modificado_periodo'] != 0 else 0
+    # Calcular disponibles y porcentajes
+    resumen['Disponible_anual'] = round_like_excel_array(resumen['Modificado_anual'] - resumen['Ejercido_acumulado'], 2)
+    resumen['Disponible_periodo'] = round_like_excel_array(resumen['Modificado_periodo'] - resumen['Ejercido_acumulado'], 2)
+    porcentajes_avance(resumen)
     
-    # Congelados
-    df_para_congelados = df_para_congelados[df_para_congelados['Nueva UR'].astype(str).isin(urs_validas)]
-    df_para_congelados = df_para_congelados[~df_para_congelados['Partida'].isin([39801, 39810])]
-    df_para_congelados = df_para_congelados[df_para_congelados['CAPITULO'] != 1]
+    # Subtotales por sección y total general
+    consolidado = consolidar_secciones(resumen, config)
+    subtotales = {seccion: consolidado.loc[seccion].to_dict() for seccion in SECCIONES_SICOP}
+    total_general = consolidado.loc['total'].to_dict()
     
-    congelado_anual = calcular_congelado_anual(df_para_congelados)
-    congelado_periodo = calcular_congelado_periodo(df_para_congelados, mes_archivo)
+    # Congelados
+    congelado_anual = calcular_congelado_anual(df, filas_congelados)
+    congelado_periodo = calcular_congelado_periodo(df, mes_archivo, filas_congelados)
+    if centavos:
+        congelado_anual = centavos_a_pesos(congelado_anual)
+        congelado_periodo = centavos_a_pesos(congelado_periodo)
     
     # =========================================================================
     # CALCULOS ADICIONALES PARA DASHBOARD PRESUPUESTO
@@ -274,100 +556,28 @@ def procesar_sicop(df, filename):
         38501: 'Gastos de representacion',
     }
     
-    # Catalogo de programas
-    catalogo_programas = config.get('programas_nombres', {})
-    
     # Calcular datos por capitulo para cada UR
-    capitulos_por_ur = {}
-    partidas_por_ur = {}
+    capitulos_por_ur = calcular_capitulos_por_ur(
+        df, config, mes_archivo, filas=filas, incluida=incluida, periodo=periodo
+    )
+    partidas_por_ur = top_partidas_por_ur(df, config, catalogo_partidas, filas=filas, incluida=incluida)
     
-    for ur in urs_validas:
-        df_ur = df[df['Nueva UR'] == ur]
-        
-        # Filtrar para calculos (CONTROL_OPERATIVO = 10 para modificado)
-        df_ur_mod = df_ur[df_ur['CONTROL_OPERATIVO'] == 10]
-        
-        # Filtrar para ejercido segun tipo de UR
-        if ur in config['entidades_paraestatales'] or ur == 'RJL':
-            df_ur_eje = df_ur[df_ur['CONTROL_OPERATIVO'].isin([0, 50])]
-        elif ur in config['organos_desconcentrados']:
-            df_ur_eje = df_ur[df_ur['CONTROL_OPERATIVO'].isin([0, 50])]
-        else:
-            df_ur_eje = df_ur[df_ur['CONTROL_OPERATIVO'].isin([0, 50, 51])]
-        
-        # Calcular por capitulo (2, 3, 4)
-        caps_ur = {}
-        for cap in [2, 3, 4]:
-            df_cap_mod = df_ur_mod[df_ur_mod['CAPITULO'] == cap]
-            df_cap_eje = df_ur_eje[df_ur_eje['CAPITULO'] == cap]
-            
-            original = round_like_excel(df_cap_mod['ORIGINAL'].sum(), 2)
-            mod_anual = round_like_excel(df_cap_mod['MODIFICADO_AUTORIZADO'].sum(), 2)
-            
-            # Modificado periodo
-            cols_a_usar = obtener_columnas_hasta_mes(mes_archivo)
-            cols_mod = [col for col in cols_a_usar['modificaciones'] if col in df_cap_mod.columns]
-            cols_res = [col for col in cols_a_usar['reservas'] if col in df_cap_mod.columns]
-            
-            mod_bruto = df_cap_mod[cols_mod].sum(axis=1).sum() if cols_mod else 0
-            cong_periodo = df_cap_mod[cols_res].sum(axis=1).sum() if cols_res else 0
-            mod_periodo = round_like_excel(mod_bruto - cong_periodo, 2)
-            
-            ejercido = round_like_excel(df_cap_eje['EJERCIDO_REAL'].sum(), 2)
-            
-            caps_ur[str(cap)] = {
-                'Original': original,
-                'Modificado_anual': mod_anual,
-                'Modificado_periodo': mod_periodo,
-                'Ejercido_acumulado': ejercido,
-                'Disponible_periodo': round_like_excel(mod_periodo - ejercido, 2),
-            }
-        
-        capitulos_por_ur[ur] = caps_ur
-        
-        # Calcular top partidas con mayor disponible
-        df_partidas = df_ur_mod.groupby(['Partida', 'PROGRAMA_PRESUPUESTARIO']).agg({
-            'ORIGINAL': 'sum',
-            'MODIFICADO_AUTORIZADO': 'sum',
-        }).reset_index()
-        
-        # Agregar ejercido
-        df_eje_partidas = df_ur_eje.groupby(['Partida', 'PROGRAMA_PRESUPUESTARIO']).agg({
-            'EJERCIDO_REAL': 'sum',
-        }).reset_index()
-        
-        df_partidas = df_partidas.merge(df_eje_partidas, on=['Partida', 'PROGRAMA_PRESUPUESTARIO'], how='left')
-        df_partidas['EJERCIDO_REAL'] = df_partidas['EJERCIDO_REAL'].fillna(0)
-        df_partidas['Disponible'] = df_partidas['MODIFICADO_AUTORIZADO'] - df_partidas['EJERCIDO_REAL']
-        
-        # Filtrar solo partidas con disponible > 0 y ordenar
-        df_partidas = df_partidas[df_partidas['Disponible'] > 0].sort_values('Disponible', ascending=False).head(5)
-        
-        partidas_list = []
-        for _, row in df_partidas.iterrows():
-            partida = int(row['Partida'])
-            programa = row['PROGRAMA_PRESUPUESTARIO']
-            partidas_list.append({
-                'Partida': partida,
-                'Denominacion': catalogo_partidas.get(partida, ''),
-                'Programa': programa,
-                'Denom_Programa': catalogo_programas.get(programa, ''),
-                'Original': round_like_excel(row['ORIGINAL'], 2),
-                'Modificado': round_like_excel(row['MODIFICADO_AUTORIZADO'], 2),
-                'Ejercido': round_like_excel(row['EJERCIDO_REAL'], 2),
-                'Disponible': round_like_excel(row['Disponible'], 2),
-            })
-        
-        partidas_por_ur[ur] = partidas_list
+    if centavos:
+        # Los resultados se entregan en pesos; df_procesado conserva los centavos
+        excluir = ('Pct_avance_anual', 'Pct_avance_periodo', 'Partida', 'Denominacion', 'Programa', 'Denom_Programa')
+        resumen[COLUMNAS_MONTO_RESUMEN] = centavos_a_pesos(resumen[COLUMNAS_MONTO_RESUMEN])
+        subtotales = {seccion: montos_a_pesos(datos, excluir) for seccion, datos in subtotales.items()}
+        total_general = montos_a_pesos(total_general, excluir)
+        capitulos_por_ur = {
+            ur: {cap: montos_a_pesos(datos) for cap, datos in caps.items()} for ur, caps in capitulos_por_ur.items()
+        }
+        partidas_por_ur = {
+            ur: [montos_a_pesos(datos, excluir) for datos in partidas] for ur, partidas in partidas_por_ur.items()
+        }
     
     return {
         'resumen': resumen,
-        'subtotales': {
-            'sector_central': subtotal_sc,
-            'oficinas': subtotal_of,
-            'organos_desconcentrados': subtotal_od,
-            'entidades_paraestatales': subtotal_ep,
-        },
+        'subtotales': subtotales,
         'congelados': {
             'anual': congelado_anual,
             'periodo': congelado_periodo,
@@ -381,9 +591,9 @@ def procesar_sicop(df, filename):
             'fecha_archivo': fecha_archivo,
             'mes': mes_archivo,
             'año': año_archivo,
-            'registros': len(df),
+            'registros': registros,
             'es_cierre': es_cierre_año_anterior,
+            'centavos': centavos,
             'config': config,
         },
-        'df_procesado': df,
     }
@@ -0,0 +1,185 @@
+"""
+Datos SICOP sintéticos y cálculos originales del SICOP (por UR, con un
+filtro del DataFrame por cada UR) contra los que se comparan las versiones
+agrupadas de sicop_processor
+"""
+
+import numpy as np
+import pandas as pd
+
+from config import get_config_by_year, round_like_excel
+from csv_loader import MESES_MODIFICACIONES_SICOP, MESES_RESERVAS_SICOP
+from sicop_processor import (
+    CAPITULOS_DETALLE, mascaras_reporte, obtener_columnas_hasta_mes, obtener_urs_validas, preparar_sicop
+)
+
+FILAS = 3_000
+
+
+def sicop_crudo(año, semilla=0, empates=False):
+    """
+    DataFrame SICOP sintético con las columnas del archivo, con URs de todas las
+    secciones, URs por mapear y montos en centavos.
+
+    Con empates=True los montos son múltiplos de 100,000 entre -500,000 y
+    500,000, así que muchas sumas coinciden.
+    """
+    config = get_config_by_year(año)
+    generador = np.random.default_rng(semilla)
+    unidades = (
+        config['sector_central'][:5] + config['oficinas'][:3] +
+        config['organos_desconcentrados'] + config['entidades_paraestatales'][:4] +
+        ['121', '108', 'G00', '999']
+    )
+
+    def montos():
+        if empates:
+            return generador.integers(-5, 6, FILAS) * 100_000.0
+        return np.round(generador.normal(0, 1e6, FILAS), 2)
+
+    return pd.DataFrame({
+        'ID_UNIDAD': generador.choice(unidades, FILAS),
+        'CAPITULO': generador.choice([1, 2, 3, 4, 5, 7], FILAS),
+        'CONCEPTO': generador.integers(1, 10, FILAS),
+        'PARTIDA_GENERICA': generador.integers(1, 10, FILAS),
+        'PARTIDA_ESPECIFICA': generador.integers(0, 10, FILAS),
+        'CONTROL_OPERATIVO': generador.choice([0, 10, 40, 50, 51, 60], FILAS),
+        'PROGRAMA_PRESUPUESTARIO': generador.choice(['M001', 'S263', 'E001'], FILAS),
+        'ORIGINAL': montos(),
+        'MODIFICADO_AUTORIZADO': montos(),
+        'RESERVAS': montos(),
+        'EJERCIDO': montos(),
+        'DEVENGADO': montos(),
+        'EJERCIDO_TRAMITE': montos(),
+        **{f'MO{abrev}': montos() for abrev in MESES_MODIFICACIONES_SICOP},
+        **{f'RESERVA_{mes}': montos() for mes in MESES_RESERVAS_SICOP},
+    })
+
+
+def sicop_prueba(año, semilla=0, empates=False):
+    """
+    DataFrame SICOP sintético (ver sicop_crudo) ya preparado con preparar_sicop.
+
+    Returns:
+        Tupla (df, config, principal): el DataFrame con todas sus filas y la
+        máscara de filas del reporte (mascaras_reporte)
+    """
+    config = get_config_by_year(año)
+    df = preparar_sicop(sicop_crudo(año, semilla, empates), config)
+    principal, _ = mascaras_reporte(df, obtener_urs_validas(config))
+    return df, config, principal
+
+
+def resumen_por_ur_referencia(df, config, mes_archivo, es_cierre_año_anterior):
+    """Cálculo por UR filtrando el DataFrame una vez por UR, como lo hacía procesar_sicop"""
+    resultados_ur = {}
+    for ur in obtener_urs_validas(config):
+        df_ur = df[df['Nueva UR'].astype(str) == ur].copy()
+        if len(df_ur) == 0:
+            resultados_ur[ur] = {'Original': 0, 'Modificado_anual': 0, 'Modificado_periodo': 0, 'Ejercido': 0}
+            continue
+
+        original = round_like_excel(df_ur[df_ur['CONTROL_OPERATIVO'] == 0]['ORIGINAL'].sum(), 2)
+        if ur in config['entidades_paraestatales'] or ur == 'RJL' or ur in config['organos_desconcentrados']:
+            df_modificado = df_ur[df_ur['CONTROL_OPERATIVO'].isin([0, 50])]
+        else:
+            df_modificado = df_ur[df_ur['CONTROL_OPERATIVO'].isin([0, 50, 51])]
+
+        modificado_anual = round_like_excel(df_modificado['Modificado_neto'].sum(), 2)
+        if es_cierre_año_anterior or mes_archivo == 12:
+            modificado_periodo = modificado_anual
+        else:
+            cols_a_usar = obtener_columnas_hasta_mes(mes_archivo)
+            cols_mod = [col for col in cols_a_usar['modificaciones'] if col in df_modificado.columns]
+            cols_res = [col for col in cols_a_usar['reservas'] if col in df_modificado.columns]
+            mod_bruto = df_modificado[cols_mod].sum(axis=1).sum() if cols_mod else 0
+            cong_periodo = df_modificado[cols_res].sum(axis=1).sum() if cols_res else 0
+            modificado_periodo = round_like_excel(mod_bruto - cong_periodo, 2)
+
+        resultados_ur[ur] = {
+            'Original': original,
+            'Modificado_anual': modificado_anual,
+            'Modificado_periodo': modificado_periodo,
+            'Ejercido': round_like_excel(df_modificado['EJERCIDO_REAL'].sum(), 2),
+        }
+    return pd.DataFrame.from_dict(resultados_ur, orient='index')
+
+
+def capitulos_por_ur_referencia(df, config, mes_archivo):
+    """Desglose por UR y capítulo filtrando el DataFrame por UR y por capítulo, como lo hacía procesar_sicop"""
+    capitulos_por_ur = {}
+    for ur in obtener_urs_validas(config):
+        df_ur = df[df['Nueva UR'] == ur]
+        df_ur_mod = df_ur[df_ur['CONTROL_OPERATIVO'] == 10]
+        if ur in config['entidades_paraestatales'] or ur == 'RJL' or ur in config['organos_desconcentrados']:
+            df_ur_eje = df_ur[df_ur['CONTROL_OPERATIVO'].isin([0, 50])]
+        else:
+            df_ur_eje = df_ur[df_ur['CONTROL_OPERATIVO'].isin([0, 50, 51])]
+
+        caps_ur = {}
+        for cap in CAPITULOS_DETALLE:
+            df_cap_mod = df_ur_mod[df_ur_mod['CAPITULO'] == cap]
+            df_cap_eje = df_ur_eje[df_ur_eje['CAPITULO'] == cap]
+
+            cols_a_usar = obtener_columnas_hasta_mes(mes_archivo)
+            cols_mod = [col for col in cols_a_usar['modificaciones'] if col in df_cap_mod.columns]
+            cols_res = [col for col in cols_a_usar['reservas'] if col in df_cap_mod.columns]
+            mod_bruto = df_cap_mod[cols_mod].sum(axis=1).sum() if cols_mod else 0
+            cong_periodo = df_cap_mod[cols_res].sum(axis=1).sum() if cols_res else 0
+            mod_periodo = round_like_excel(mod_bruto - cong_periodo, 2)
+            ejercido = round_like_excel(df_cap_eje['EJERCIDO_REAL'].sum(), 2)
+
+            caps_ur[str(cap)] = {
+                'Original': round_like_excel(df_cap_mod['ORIGINAL'].sum(), 2),
+                'Modificado_anual': round_like_excel(df_cap_mod['MODIFICADO_AUTORIZADO'].sum(), 2),
+                'Modificado_periodo': mod_periodo,
+                'Ejercido_acumulado': ejercido,
+                'Disponible_periodo': round_like_excel(mod_periodo - ejercido, 2),
+            }
+        capitulos_por_ur[ur] = caps_ur
+    return capitulos_por_ur
+
+
+def top_partidas_por_ur_referencia(df, config, catalogo_partidas, top):
+    """Partidas con mayor disponible filtrando el DataFrame una vez por UR, como lo hacía procesar_sicop"""
+    catalogo_programas = config.get('programas_nombres', {})
+    partidas_por_ur = {}
+    for ur in obtener_urs_validas(config):
+        df_ur = df[df['Nueva UR'] == ur]
+        df_ur_mod = df_ur[df_ur['CONTROL_OPERATIVO'] == 10]
+        if ur in config['entidades_paraestatales'] or ur == 'RJL' or ur in config['organos_desconcentrados']:
+            df_ur_eje = df_ur[df_ur['CONTROL_OPERATIVO'].isin([0, 50])]
+        else:
+            df_ur_eje = df_ur[df_ur['CONTROL_OPERATIVO'].isin([0, 50, 51])]
+
+        df_partidas = df_ur_mod.groupby(['Partida', 'PROGRAMA_PRESUPUESTARIO'], observed=True).agg({
+            'ORIGINAL': 'sum',
+            'MODIFICADO_AUTORIZADO': 'sum',
+        }).reset_index()
+        df_eje_partidas = df_ur_eje.groupby(['Partida', 'PROGRAMA_PRESUPUESTARIO'], observed=True).agg({
+            'EJERCIDO_REAL': 'sum',
+        }).reset_index()
+        df_partidas = df_partidas.merge(df_eje_partidas, on=['Partida', 'PROGRAMA_PRESUPUESTARIO'], how='left')
+        df_partidas['EJERCIDO_REAL'] = df_partidas['EJERCIDO_REAL'].fillna(0)
+        df_partidas['Disponible'] = df_partidas['MODIFICADO_AUTORIZADO'] - df_partidas['EJERCIDO_REAL']
+        # El original ordenaba con quicksort, sin un orden definido entre empates; con
+        # orden estable los empates quedan por partida y programa, como en top_partidas_por_ur
+        df_partidas = df_partidas[df_partidas['Disponible'] > 0]
+        df_partidas = df_partidas.sort_values('Disponible', ascending=False, kind='stable').head(top)
+
+        partidas_list = []
+        for _, row in df_partidas.iterrows():
+            partida = int(row['Partida'])
+            programa = row['PROGRAMA_PRESUPUESTARIO']
+            partidas_list.append({
+                'Partida': partida,
+                'Denominacion': catalogo_partidas.get(partida, ''),
+                'Programa': programa,
+                'Denom_Programa': catalogo_programas.get(programa, ''),
+                'Original': round_like_excel(row['ORIGINAL'], 2),
+                'Modificado': round_like_excel(row['MODIFICADO_AUTORIZADO'], 2),
+                'Ejercido': round_like_excel(row['EJERCIDO_REAL'], 2),
+                'Disponible': round_like_excel(row['Disponible'], 2),
+            })
+        partidas_por_ur[ur] = partidas_list
+    return partidas_por_ur
@@ -0,0 +1,43 @@
+"""
+Equivalencia del procesamiento por bloques (procesar_sicop_por_bloques) con
+el procesamiento del archivo completo en memoria (procesar_sicop)
+"""
+
+import pandas as pd
+import pytest
+
+from csv_loader import ENCODING_CSV, cargar_csv
+from referencia_sicop import sicop_crudo
+from sicop_processor import procesar_sicop, procesar_sicop_por_bloques
+
+
+def comparar(esperado, obtenido, ruta='resultados'):
+    """Compara dos resultados campo por campo; los DataFrames con assert_frame_equal"""
+    if isinstance(esperado, pd.DataFrame):
+        pd.testing.assert_frame_equal(obtenido, esperado, check_exact=True, obj=ruta)
+    elif isinstance(esperado, dict):
+        assert obtenido.keys() == esperado.keys(), ruta
+        for llave in esperado:
+            comparar(esperado[llave], obtenido[llave], f'{ruta}[{llave!r}]')
+    elif isinstance(esperado, list):
+        assert len(obtenido) == len(esperado), ruta
+        for i, (a, b) in enumerate(zip(esperado, obtenido)):
+            comparar(a, b, f'{ruta}[{i}]')
+    else:
+        assert obtenido == esperado, ruta
+
+
+@pytest.mark.parametrize('filename', ['SICOP_15JUN2025.csv', 'SICOP_10MAR2026.csv'])
+@pytest.mark.parametrize('centavos', [False, True])
+def test_bloques_igual_a_memoria(tmp_path, filename, centavos):
+    año = int(filename[-8:-4])
+    # Ordenado por UR: cada bloque trae otras categorías de ID_UNIDAD y Nueva UR
+    crudo = sicop_crudo(año).sort_values('ID_UNIDAD', kind='stable')
+    ruta = tmp_path / filename
+    crudo.to_csv(ruta, index=False, encoding=ENCODING_CSV)
+
+    df = cargar_csv(ruta, 'SICOP', filename, centavos=centavos)
+    esperado = procesar_sicop(df, filename, centavos=centavos, ligero=True)
+    obtenido = procesar_sicop_por_bloques(ruta, filename, tamaño_bloque=250, centavos=centavos)
+
+    comparar(esperado, obtenido)
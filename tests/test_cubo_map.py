@@ -0,0 +1,42 @@
+"""
+Equivalencia de desglosar_cubo con la suma por groupby
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import round_like_excel_array
+from map_processor import LLAVES_CUBO, COLUMNAS_CUBO, armar_cubo, desglosar_cubo
+
+
+def cubo_prueba(semilla=0, filas=3000):
+    """Cubo armado con llaves categóricas y montos con centavos"""
+    generador = np.random.default_rng(semilla)
+    df = pd.DataFrame({
+        'Pp': pd.Categorical(generador.choice(['E001', 'S263', 'S293', 'U004'], filas)),
+        'Capitulo': generador.choice([1000, 2000, 3000, 4000], filas),
+        'NuevaUR': pd.Categorical(generador.choice(['100', '210', '313', 'B00', 'IZC'], filas)),
+        'PARTIDA': generador.choice([21101, 33104, 43101, 44102, 39801], filas),
+    })
+    for columna in COLUMNAS_CUBO:
+        df[columna] = np.round(generador.uniform(-1e6, 1e7, filas), 2)
+    return armar_cubo(df)
+
+
+def desglosar_referencia(cubo, nivel, **filtros):
+    """Implementación anterior de desglosar_cubo con groupby"""
+    seleccion = cubo
+    for llave, valor in filtros.items():
+        seleccion = seleccion.xs(valor, level=llave, drop_level=False)
+    return round_like_excel_array(seleccion.groupby(level=nivel, observed=True).sum(), 2)
+
+
+@pytest.mark.parametrize('nivel', LLAVES_CUBO)
+@pytest.mark.parametrize('filtros', [{}, {'Pp': 'S263'}, {'Pp': 'E001', 'NuevaUR': '313'}, {'Capitulo': 4000}])
+def test_desglosar_cubo_igual_a_groupby(nivel, filtros):
+    cubo = cubo_prueba()
+    pd.testing.assert_frame_equal(
+        desglosar_cubo(cubo, nivel, **filtros),
+        desglosar_referencia(cubo, nivel, **filtros),
+    )
@@ -0,0 +1,50 @@
+"""
+Equivalencia del redondeo vectorizado con round_like_excel
+"""
+
+import numpy as np
+import pytest
+
+from config import round_like_excel, round_like_excel_array
+
+
+def valores_prueba():
+    """Empates .xx5 positivos y negativos, sus vecinos, valores aleatorios y casos especiales"""
+    # Todos los múltiplos de 0.001 entre -100 y 100 (incluye cada empate de medio centavo)
+    milesimas = np.arange(-100_000, 100_001) / 1000
+    vecinos = np.concatenate([np.nextafter(milesimas, np.inf), np.nextafter(milesimas, -np.inf)])
+
+    generador = np.random.default_rng(0)
+    magnitudes = 10.0 ** generador.uniform(-4, 13, 20_000)
+    signos = generador.choice([-1.0, 1.0], magnitudes.size)
+    aleatorios = np.concatenate([
+        signos * magnitudes,
+        np.round(signos * magnitudes, 3),
+        # Empates exactos en montos grandes
+        np.floor(signos * magnitudes) + 0.005 * signos,
+    ])
+    especiales = np.array([0.0, -0.0, 1e12, -1e12, 1e12 - 0.005, -1e12 + 0.005, 1e15 + 0.125, 5e-324])
+    return np.concatenate([milesimas, vecinos, aleatorios, especiales])
+
+
+def test_igual_a_round_like_excel_bit_a_bit():
+    valores = valores_prueba()
+    esperado = np.array([round_like_excel(v, 2) for v in valores], dtype=np.float64)
+    obtenido = round_like_excel_array(valores, 2)
+
+    # Comparación bit a bit (distingue 0.0 de -0.0)
+    distintos = np.flatnonzero(esperado.view(np.int64) != obtenido.view(np.int64))
+    assert distintos.size == 0, [(valores[i], esperado[i], obtenido[i]) for i in distintos[:10]]
+
+
+@pytest.mark.parametrize('valor, esperado', [
+    (0.005, 0.01), (-0.005, -0.01), (2.675, 2.68), (-2.675, -2.68), (1.005, 1.01), (-1.005, -1.01),
+    (0.015, 0.02), (0.025, 0.03), (-0.125, -0.13), (1234567.895, 1234567.9),
+])
+def test_empates_se_alejan_de_cero(valor, esperado):
+    assert round_like_excel_array(np.array([valor]), 2)[0] == esperado
+    assert round_like_excel(valor, 2) == esperado
+
+
+def test_nulos_quedan_en_cero():
+    assert round_like_excel_array(np.array([np.nan]), 2)[0] == 0.0
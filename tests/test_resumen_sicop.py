@@ -0,0 +1,88 @@
+"""
+Equivalencia de los cálculos por UR con un groupby (resumen_por_ur,
+calcular_capitulos_por_ur, top_partidas_por_ur) contra los cálculos originales que filtraban el
+DataFrame una vez por UR, y subtotales por sección (consolidar_secciones)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from referencia_sicop import (
+    capitulos_por_ur_referencia, resumen_por_ur_referencia, sicop_prueba, top_partidas_por_ur_referencia
+)
+from sicop_processor import (
+    SECCIONES_SICOP, calcular_capitulos_por_ur, consolidar_secciones, resumen_por_ur, top_partidas_por_ur
+)
+
+
+@pytest.mark.parametrize('año, mes, es_cierre', [
+    (2025, 6, False), (2026, 3, False), (2026, 12, False), (2026, 1, True),
+])
+def test_resumen_por_ur_igual_a_referencia(año, mes, es_cierre):
+    df, config, principal = sicop_prueba(año)
+    df = df[principal]
+    esperado = resumen_por_ur_referencia(df, config, mes, es_cierre)
+    obtenido = resumen_por_ur(df, config, mes, es_cierre)
+
+    assert list(obtenido.index) == list(esperado.index)
+    pd.testing.assert_frame_equal(
+        obtenido[esperado.columns].astype(float), esperado.astype(float), check_exact=True, check_names=False
+    )
+
+
+@pytest.mark.parametrize('año, mes', [(2025, 6), (2026, 3), (2026, 12)])
+def test_capitulos_por_ur_igual_a_referencia(año, mes):
+    df, config, principal = sicop_prueba(año)
+    esperado = capitulos_por_ur_referencia(df[principal], config, mes)
+
+    # Mismo resultado filtrando con la máscara (procesar_sicop) o sobre las filas ya filtradas
+    assert calcular_capitulos_por_ur(df, config, mes, filas=principal) == esperado
+    assert calcular_capitulos_por_ur(df[principal], config, mes) == esperado
+
+
+@pytest.mark.parametrize('año', [2025, 2026])
+@pytest.mark.parametrize('empates', [False, True])
+@pytest.mark.parametrize('top', [3, 1_000])
+def test_top_partidas_por_ur_igual_a_referencia(año, empates, top):
+    df, config, principal = sicop_prueba(año, empates=empates)
+    catalogo = {partida: f'Partida {partida}' for partida in df['Partida'].unique()[::2]}
+    esperado = top_partidas_por_ur_referencia(df[principal], config, catalogo, top)
+
+    # Con top=1000 todas las URs tienen menos partidas que el límite
+    assert top < 1_000 or all(len(partidas) < top for partidas in esperado.values())
+    if empates:
+        assert any(
+            anterior['Disponible'] == siguiente['Disponible']
+            for partidas in esperado.values() for anterior, siguiente in zip(partidas, partidas[1:])
+        )
+    assert top_partidas_por_ur(df, config, catalogo, top=top, filas=principal) == esperado
+
+
+def test_consolidar_secciones_por_capitulo():
+    df, config, principal = sicop_prueba(2026)
+    capitulos = calcular_capitulos_por_ur(df, config, 3, filas=principal)
+    # Tabla por UR y capítulo sin Disponible_anual (no está en el desglose por capítulo)
+    tabla = pd.DataFrame([
+        {'UR': ur, 'CAPITULO': int(cap), **montos}
+        for ur, caps in capitulos.items() for cap, montos in caps.items()
+    ])
+
+    consolidado = consolidar_secciones(tabla, config, niveles=['CAPITULO'])
+
+    montos = [col for col in tabla.columns if col not in ('UR', 'CAPITULO')]
+    assert list(consolidado.columns) == montos + ['Pct_avance_anual', 'Pct_avance_periodo']
+
+    # Cada sección con URs en la tabla, en orden, y el total al final
+    secciones = {seccion: tabla['UR'].isin(config[seccion]) for seccion in SECCIONES_SICOP}
+    secciones = {seccion: filas for seccion, filas in secciones.items() if filas.any()}
+    assert list(consolidado.index.unique('Seccion')) == list(secciones) + ['total']
+    secciones['total'] = np.logical_or.reduce(list(secciones.values()))
+
+    for seccion, filas in secciones.items():
+        esperado = tabla[filas].groupby('CAPITULO')[montos].sum()
+        obtenido = consolidado.loc[seccion]
+        np.testing.assert_allclose(obtenido.loc[esperado.index, montos], esperado, rtol=1e-12)
+        modificado = obtenido['Modificado_periodo']
+        avance = (obtenido['Ejercido_acumulado'] / modificado).where(modificado != 0, 0.0)
+        np.testing.assert_allclose(obtenido['Pct_avance_periodo'], avance)